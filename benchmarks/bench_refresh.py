@@ -0,0 +1,156 @@
+"""Refresh benchmark for QuandifyAPI and QuandifyDataUpdateCoordinator.
+
+Starts the cloud stub in a subprocess, so its CPU time is not counted, and
+drives full-fleet refreshes against it. For each fleet size it reports refresh
+latency percentiles, requests per cycle, client CPU time per cycle and peak
+memory allocated during a refresh.
+
+Run from the repository root (Home Assistant must be installed):
+
+    python -m benchmarks.bench_refresh --fleet 1 10 100 1000 --cycles 20
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from custom_components.quandify.api import QuandifyAPI
+from custom_components.quandify.coordinator import QuandifyDataUpdateCoordinator
+from custom_components.quandify.models import QuandifyDevice
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def _start_stub(
+    args: argparse.Namespace, devices: int
+) -> tuple[asyncio.subprocess.Process, str]:
+    """Start the stub server and wait until it accepts requests."""
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.stub_server",
+        "--port", str(port),
+        "--devices", str(devices),
+        "--latency", str(args.latency),
+        "--error-rate", str(args.error_rate),
+        "--token-ttl", str(args.token_ttl),
+    ]
+    if not args.bulk:
+        command.append("--no-bulk")
+    if not args.delta:
+        command.append("--no-delta")
+    process = await asyncio.create_subprocess_exec(*command)
+    base_url = f"http://127.0.0.1:{port}"
+
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"{base_url}/_stub/stats"):
+                    return process, base_url
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Stub server did not start")
+
+
+async def _stub_call(session: aiohttp.ClientSession, method: str, url: str) -> dict:
+    async with session.request(method, url) as response:
+        return await response.json() if response.status == 200 else {}
+
+
+async def bench_fleet(args: argparse.Namespace, size: int) -> dict[str, float]:
+    """Run the refresh benchmark for one fleet size."""
+    process, base_url = await _start_stub(args, size)
+    hass = HomeAssistant(tempfile.mkdtemp())
+    try:
+        async with aiohttp.ClientSession() as session:
+            api = QuandifyAPI(session, {}, api_base_url=base_url, auth_base_url=base_url)
+            await api.login("bench@example.com", "secret")
+            devices = [
+                device
+                for raw in await api.get_devices()
+                if (device := QuandifyDevice.from_api(raw)) is not None
+            ]
+            coordinator = QuandifyDataUpdateCoordinator(
+                hass, api, devices, max_parallel_requests=args.parallel
+            )
+            await _stub_call(session, "post", f"{base_url}/_stub/reset")
+
+            latencies: list[float] = []
+            failures = 0
+            cpu_start = time.process_time()
+            for _ in range(args.cycles):
+                # Make every device due, to measure a full-fleet refresh.
+                coordinator._next_poll.clear()
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                latencies.append(time.perf_counter() - start)
+                failures += not coordinator.last_update_success
+            cpu = time.process_time() - cpu_start
+            stats = await _stub_call(session, "get", f"{base_url}/_stub/stats")
+
+            tracemalloc.start()
+            coordinator._next_poll.clear()
+            await coordinator.async_refresh()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        await hass.async_stop(force=True)
+        process.terminate()
+        await process.wait()
+
+    return {
+        "devices": size,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "requests": stats.get("requests", 0) / args.cycles,
+        "cpu_ms": cpu / args.cycles * 1000,
+        "peak_kib": peak / 1024,
+        "failures": failures,
+        "unauthorized": stats.get("unauthorized", 0),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(
+        f"{'devices':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'req/cycle':>10} {'cpu ms':>8} {'peak KiB':>9} {'fail':>5} {'401':>5}"
+    )
+    for size in args.fleet:
+        result = await bench_fleet(args, size)
+        print(
+            f"{result['devices']:>8} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+            f"{result['p99_ms']:>9.1f} {result['requests']:>10.1f} "
+            f"{result['cpu_ms']:>8.1f} {result['peak_kib']:>9.1f} "
+            f"{result['failures']:>5} {result['unauthorized']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Quandify refreshes.")
+    parser.add_argument("--fleet", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=float, default=3600.0)
+    parser.add_argument("--no-bulk", dest="bulk", action="store_false")
+    parser.add_argument("--no-delta", dest="delta", action="store_false")
+    asyncio.run(main(parser.parse_args()))
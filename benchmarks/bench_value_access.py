@@ -0,0 +1,105 @@
+"""Micro-benchmark for entity value extraction.
+
+Compares walking `entity_description.key.split(".")` over the raw JSON on every
+update, as the platforms used to, with the accessors compiled once by
+`compile_value_fn` over the parsed device model.
+
+Run from the repository root (Home Assistant must be installed):
+
+    python -m benchmarks.bench_value_access --entities 5000 --rounds 20
+"""
+
+import argparse
+import time
+from typing import Any
+
+from custom_components.quandify.binary_sensor import BINARY_SENSORS
+from custom_components.quandify.entity import compile_value_fn
+from custom_components.quandify.models import QuandifyDeviceData
+from custom_components.quandify.sensor import SENSORS
+
+KEYS = [
+    "status.total_volume",
+    "status.avg_water_temp",
+    "status.wifi_signal_strength",
+    "leak_status.leak_state",
+    "sub_type",
+]
+
+# The transforms the shipped entity descriptions use, by key.
+TRANSFORMS = {
+    key: description.transform
+    for key, description in {**SENSORS, **BINARY_SENSORS}.items()
+}
+
+
+def legacy_value(key: str, data: dict[str, Any] | None) -> Any:
+    """Return a value the way the platforms did before accessors were compiled."""
+    value = data
+    if value is None:
+        return None
+    if key == "sub_type":
+        sub_type = value.get("sub_type")
+        return sub_type.capitalize() if sub_type else None
+    try:
+        for key_part in key.split("."):
+            if value is None:
+                break
+            value = value.get(key_part)
+    except AttributeError:
+        value = None
+    if key == "leak_status.leak_state":
+        return value != "noLeak"
+    return value
+
+
+def device_payload(index: int) -> dict[str, Any]:
+    """Return a device payload shaped like the API response."""
+    return {
+        "id": f"device-{index}",
+        "sub_type": "cold",
+        "status": {
+            "total_volume": 1000.0 + index,
+            "avg_water_temp": 12.5,
+            "wifi_signal_strength": -60,
+        },
+        "leak_status": {"leak_state": "noLeak"},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    entities = [
+        (KEYS[i % len(KEYS)], device_payload(i // len(KEYS)))
+        for i in range(args.entities)
+    ]
+    compiled = [
+        (compile_value_fn(key, TRANSFORMS.get(key)), QuandifyDeviceData.from_api(data))
+        for key, data in entities
+    ]
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for key, data in entities:
+            legacy_value(key, data)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for value_fn, data in compiled:
+            value_fn(data)
+    accessor = time.perf_counter() - start
+
+    updates = args.entities * args.rounds
+    print(f"{args.entities} entities x {args.rounds} refreshes")
+    print(f"split/walk per update: {legacy / updates * 1e9:8.1f} ns")
+    print(f"compiled per update:   {accessor / updates * 1e9:8.1f} ns")
+    print(f"speedup:               {legacy / accessor:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""A local stub of the Quandify auth and API endpoints.
+
+Serves both hosts from one aiohttp app, so `QuandifyAPI` can point both its
+auth and API base URLs at it. Latency, error rate, token lifetime and fleet
+size are configurable. Test hooks live under `/_stub`:
+
+- `GET /_stub/stats` returns request counters, `POST /_stub/reset` clears them.
+- `POST /_stub/devices/{device_id}/leak` starts a leak and pushes it to streams.
+- `POST /_stub/devices/{device_id}/consume?liters=N` adds to the total volume.
+
+Run standalone with:
+
+    python -m benchmarks.stub_server --port 8099 --devices 100
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import web
+
+ORGANIZATION_ID = "stub-organization"
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the simulated cloud."""
+
+    devices: int = 10
+    latency: float = 0.05
+    latency_jitter: float = 0.02
+    error_rate: float = 0.0
+    token_ttl: float = 3600.0
+    bulk: bool = True
+    delta: bool = True
+
+
+@dataclass
+class StubState:
+    """Mutable state of the simulated cloud."""
+
+    config: StubConfig
+    devices: dict[str, dict[str, Any]] = field(default_factory=dict)
+    versions: dict[str, int] = field(default_factory=dict)
+    # Global change counter, used as the sync cursor, and when each device changed.
+    sequence: int = 0
+    changed_at: dict[str, int] = field(default_factory=dict)
+    tokens: dict[str, float] = field(default_factory=dict)
+    stats: Counter = field(default_factory=Counter)
+    streams: set[asyncio.Queue] = field(default_factory=set)
+
+
+def make_token(ttl: float) -> str:
+    """Return an unsigned JWT with an `exp` claim."""
+
+    def encode(part: dict[str, Any]) -> str:
+        raw = json.dumps(part).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    claims = {"exp": int(time.time() + ttl), "nonce": random.random()}
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.stub"
+
+
+def make_device(index: int) -> dict[str, Any]:
+    """Return a Water Grip device object as returned by the API."""
+    return {
+        "id": f"device-{index:05d}",
+        "type": "waterfuse",
+        "hardware_version": 5,
+        "serial": f"WG{index:08d}",
+        "firmware_version": "1.0.0",
+        "sub_type": "cold" if index % 2 else "hot",
+        "node": {"name": f"Water Grip {index}"},
+        "status": {
+            "total_volume": 1000.0 + index,
+            "avg_water_temp": 12.5,
+            "ambient_temp": 21.0,
+            "wifi_signal_strength": -60,
+        },
+        "leak_status": {"leak_state": "noLeak"},
+    }
+
+
+def _state(request: web.Request) -> StubState:
+    return request.app["state"]
+
+
+@web.middleware
+async def simulate_cloud(request: web.Request, handler):
+    """Count requests and add latency, random failures and auth checks."""
+    state = _state(request)
+    if request.path.startswith("/_stub"):
+        return await handler(request)
+
+    route = request.match_info.route.resource
+    state.stats[route.canonical if route else request.path] += 1
+    state.stats["requests"] += 1
+
+    config = state.config
+    await asyncio.sleep(
+        max(0.0, random.gauss(config.latency, config.latency_jitter))
+    )
+    if config.error_rate and random.random() < config.error_rate:
+        state.stats["errors"] += 1
+        raise web.HTTPServiceUnavailable()
+
+    if not request.path.startswith("/login"):
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if state.tokens.get(token, 0) < time.time():
+            state.stats["unauthorized"] += 1
+            raise web.HTTPUnauthorized()
+
+    response = await handler(request)
+    if isinstance(response, web.Response) and response.body:
+        state.stats["bytes_sent"] += len(response.body)
+    return response
+
+
+def _issue_tokens(state: StubState) -> dict[str, Any]:
+    token = make_token(state.config.token_ttl)
+    state.tokens[token] = time.time() + state.config.token_ttl
+    return {
+        "id_token": token,
+        "refresh_token": f"refresh-{random.random()}",
+        "organization_id": ORGANIZATION_ID,
+    }
+
+
+async def login_email(request: web.Request) -> web.Response:
+    return web.json_response(_issue_tokens(_state(request)))
+
+
+async def login_refresh(request: web.Request) -> web.Response:
+    state = _state(request)
+    state.stats["token_refreshes"] += 1
+    return web.json_response(_issue_tokens(state))
+
+
+async def account(request: web.Request) -> web.Response:
+    return web.json_response({"organizationId": ORGANIZATION_ID})
+
+
+async def device_list(request: web.Request) -> web.Response:
+    return web.json_response({"data": list(_state(request).devices.values())})
+
+
+async def device_info(request: web.Request) -> web.Response:
+    state = _state(request)
+    device_id = request.match_info["device_id"]
+    if device_id not in state.devices:
+        raise web.HTTPNotFound()
+
+    etag = f'"{device_id}-{state.versions[device_id]}"'
+    if request.headers.get("If-None-Match") == etag:
+        state.stats["not_modified"] += 1
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.json_response(state.devices[device_id], headers={"ETag": etag})
+
+
+async def device_status(request: web.Request) -> web.Response:
+    state = _state(request)
+    if not state.config.bulk:
+        raise web.HTTPNotFound()
+
+    if "ids" in request.query:
+        ids = [i for i in request.query["ids"].split(",") if i]
+    else:
+        ids = list(state.devices)
+    if (since := request.query.get("since")) is not None:
+        if not state.config.delta:
+            raise web.HTTPNotFound()
+        if not since.isdigit() or int(since) > state.sequence:
+            raise web.HTTPGone()
+        ids = [i for i in ids if state.changed_at.get(i, 0) > int(since)]
+    limit = int(request.query.get("limit", 100))
+    page = int(request.query.get("page", 1))
+    selected = [state.devices[i] for i in ids if i in state.devices]
+    if fields := request.query.get("fields"):
+        keys = fields.split(",")
+        selected = [{k: d[k] for k in keys if k in d} for d in selected]
+    chunk = selected[(page - 1) * limit : page * limit]
+    next_page = page + 1 if page * limit < len(selected) else None
+    body: dict[str, Any] = {"data": chunk, "next_page": next_page}
+    if state.config.delta:
+        body["cursor"] = str(state.sequence)
+    return web.json_response(body)
+
+
+async def device_stream(request: web.Request) -> web.StreamResponse:
+    state = _state(request)
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    queue: asyncio.Queue = asyncio.Queue()
+    state.streams.add(queue)
+    try:
+        while True:
+            try:
+                update = await asyncio.wait_for(queue.get(), timeout=15)
+            except asyncio.TimeoutError:
+                await response.write(b": keep-alive\n\n")
+                continue
+            await response.write(f"data: {json.dumps(update)}\n\n".encode())
+    finally:
+        state.streams.discard(queue)
+
+
+async def device_command(request: web.Request) -> web.Response:
+    state = _state(request)
+    device_id = request.match_info["device_id"]
+    command = request.match_info["command"]
+    device = state.devices.get(device_id)
+    if device is None:
+        raise web.HTTPNotFound()
+
+    if command == "acknowledge-alarm":
+        _update(state, device_id, {"leak_status": {"leak_state": "noLeak"}})
+    elif command in ("open-valve", "close-valve"):
+        valve_state = "open" if command == "open-valve" else "closed"
+        _update(state, device_id, {"valve": {"state": valve_state}})
+    else:
+        raise web.HTTPNotFound()
+    return web.Response(status=204)
+
+
+def _update(state: StubState, device_id: str, update: dict[str, Any]) -> None:
+    """Apply a partial update to a device and push it to open streams."""
+    device = state.devices[device_id]
+    for key, value in update.items():
+        if isinstance(value, dict):
+            device[key] = {**device.get(key, {}), **value}
+        else:
+            device[key] = value
+    state.versions[device_id] += 1
+    state.sequence += 1
+    state.changed_at[device_id] = state.sequence
+    for queue in state.streams:
+        queue.put_nowait({"id": device_id, **update})
+
+
+async def stub_stats(request: web.Request) -> web.Response:
+    return web.json_response(dict(_state(request).stats))
+
+
+async def stub_reset(request: web.Request) -> web.Response:
+    _state(request).stats.clear()
+    return web.Response(status=204)
+
+
+async def stub_leak(request: web.Request) -> web.Response:
+    device_id = request.match_info["device_id"]
+    _update(_state(request), device_id, {"leak_status": {"leak_state": "leak"}})
+    return web.Response(status=204)
+
+
+async def stub_consume(request: web.Request) -> web.Response:
+    state = _state(request)
+    device_id = request.match_info["device_id"]
+    liters = float(request.query.get("liters", 1))
+    total = state.devices[device_id]["status"]["total_volume"] + liters
+    _update(state, device_id, {"status": {"total_volume": total}})
+    return web.Response(status=204)
+
+
+def create_app(config: StubConfig) -> web.Application:
+    """Create the stub application."""
+    app = web.Application(middlewares=[simulate_cloud])
+    state = StubState(config)
+    for index in range(config.devices):
+        device = make_device(index)
+        state.devices[device["id"]] = device
+        state.versions[device["id"]] = 0
+    app["state"] = state
+
+    devices = "/organization/{organization_id}/devices"
+    app.router.add_post("/login/email", login_email)
+    app.router.add_post("/login/refresh", login_refresh)
+    app.router.add_get("/accounts/{account_id}", account)
+    app.router.add_get(f"{devices}/", device_list)
+    # Fixed paths must be registered before the {device_id} route.
+    app.router.add_get(f"{devices}/status", device_status)
+    app.router.add_get(f"{devices}/stream", device_stream)
+    app.router.add_get(f"{devices}/{{device_id}}", device_info)
+    app.router.add_post(f"{devices}/{{device_id}}/commands/{{command}}", device_command)
+    app.router.add_get("/_stub/stats", stub_stats)
+    app.router.add_post("/_stub/reset", stub_reset)
+    app.router.add_post("/_stub/devices/{device_id}/leak", stub_leak)
+    app.router.add_post("/_stub/devices/{device_id}/consume", stub_consume)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Quandify cloud stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--devices", type=int, default=StubConfig.devices)
+    parser.add_argument("--latency", type=float, default=StubConfig.latency)
+    parser.add_argument("--latency-jitter", type=float, default=StubConfig.latency_jitter)
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate)
+    parser.add_argument("--token-ttl", type=float, default=StubConfig.token_ttl)
+    parser.add_argument("--no-bulk", dest="bulk", action="store_false")
+    parser.add_argument("--no-delta", dest="delta", action="store_false")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        devices=args.devices,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        token_ttl=args.token_ttl,
+        bulk=args.bulk,
+        delta=args.delta,
+    )
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
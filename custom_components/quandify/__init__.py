@@ -1,53 +1,361 @@
 """The Quandify integration."""
+import asyncio
+from collections.abc import Callable
+from datetime import timedelta
 import logging
+from typing import Any
 
 import aiohttp
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util.ssl import get_default_context
 
 from .api import QuandifyAPI, QuandifyAPIError
-from .const import DOMAIN
-from .coordinator import QuandifyDataUpdateCoordinator
+from .capabilities import OPTIONAL_PLATFORM_SECTIONS, platforms_for
+from .const import (
+    CONF_DEDICATED_SESSION,
+    CONF_ORGANIZATION_ID,
+    CONF_DEVICE_TIMEOUT,
+    CONF_MAX_PARALLEL_REQUESTS,
+    CONF_PUSH_UPDATES,
+    CONF_STALE_AFTER,
+    DEFAULT_DEDICATED_SESSION,
+    DEFAULT_DEVICE_TIMEOUT_SECONDS,
+    DEFAULT_MAX_PARALLEL_REQUESTS,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_STALE_AFTER_MINUTES,
+    DATA_ORGANIZATIONS,
+    DATA_SETUP_LOCKS,
+    DOMAIN,
+    SESSION_CONNECT_TIMEOUT_SECONDS,
+    SESSION_DNS_CACHE_SECONDS,
+    SESSION_KEEPALIVE_SECONDS,
+    SESSION_READ_TIMEOUT_SECONDS,
+    STATISTICS_IMPORT_INTERVAL_HOURS,
+)
+from .coordinator import QuandifyDataUpdateCoordinator, QuandifyOrganization
 from .models import QuandifyDevice
+from .statistics import QuandifyStatisticsImporter
+from .storage import QuandifyStore
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = ["sensor", "binary_sensor", "button"]
+# The sensor platform also carries the integration's own metrics.
+REQUIRED_PLATFORMS = {"sensor"}
+
+
+def _create_session(max_parallel_requests: int) -> aiohttp.ClientSession:
+    """Create an HTTP session tuned for the Quandify hosts.
+
+    Connections are kept alive between polls and DNS lookups are cached, so a
+    poll does not pay for a new TLS handshake. The per-host pool leaves room for
+    the push stream and a command next to the parallel device requests.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=max_parallel_requests + 2,
+        keepalive_timeout=SESSION_KEEPALIVE_SECONDS,
+        ttl_dns_cache=SESSION_DNS_CACHE_SECONDS,
+        ssl=get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(
+            connect=SESSION_CONNECT_TIMEOUT_SECONDS,
+            sock_read=SESSION_READ_TIMEOUT_SECONDS,
+        ),
+    )
+
+
+def _organization_id(entry: ConfigEntry) -> str:
+    """Return the organization a config entry belongs to."""
+    return entry.data.get(CONF_ORGANIZATION_ID) or entry.entry_id
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Quandify devices from a config entry."""
-    session = async_get_clientsession(hass)
-    api = QuandifyAPI(session, dict(entry.data))
+    """Set up Quandify devices from a config entry.
 
-    try:
-        raw_devices = await api.get_devices()
-        devices = []
-        for device_data in raw_devices:
-            device = QuandifyDevice.from_api(device_data)
-            if device is not None:
-                devices.append(device)
+    Entries of the same organization share one coordinator, so each device is
+    polled once no matter how many accounts can see it. The first entry owns
+    the coordinator and its entities. Later entries add their account, whose
+    devices the owner cannot see are then polled with it.
+    """
+    organizations: dict[str, QuandifyOrganization] = hass.data.setdefault(
+        DATA_ORGANIZATIONS, {}
+    )
+    organization_id = _organization_id(entry)
+    locks: dict[str, asyncio.Lock] = hass.data.setdefault(DATA_SETUP_LOCKS, {})
+    # Entries of an organization are set up concurrently; only one may create
+    # its coordinator. Other organizations are set up in parallel.
+    async with locks.setdefault(organization_id, asyncio.Lock()):
+        if (organization := organizations.get(organization_id)) is None:
+            coordinator = await _async_setup_coordinator(hass, entry)
+            organization = organizations[organization_id] = QuandifyOrganization(
+                coordinator, entry.entry_id
+            )
+        organization.entry_ids.add(entry.entry_id)
 
-    except (aiohttp.ClientError, ValueError, QuandifyAPIError) as err:
-        _LOGGER.error("Failed to set up Quandify integration during device fetch: %s", err)
-        raise ConfigEntryNotReady(f"Failed to get devices: {err}") from err
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = organization.coordinator
 
-    coordinator = QuandifyDataUpdateCoordinator(hass, api, devices)
-    await coordinator.async_config_entry_first_refresh()
+    if organization.owner_entry_id == entry.entry_id:
+        await _async_forward_platforms(hass, entry, organization)
+    else:
+        _LOGGER.debug(
+            "Config entry %s shares the coordinator of organization %s",
+            entry.title,
+            organization_id,
+        )
+        _async_add_member(hass, entry, organization.coordinator)
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    options = dict(entry.options)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Reload the config entry when its options change."""
+        # Token refreshes also update the entry; those must not trigger a reload.
+        if dict(entry.options) != options:
+            await hass.config_entries.async_reload(entry.entry_id)
+
+    # Only the owner's options apply, so other entries never need a reload.
+    if organization.owner_entry_id == entry.entry_id:
+        entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     return True
 
 
+def _platforms_in_use(coordinator: QuandifyDataUpdateCoordinator) -> set[str]:
+    """Return the platforms the coordinator's devices have entities on.
+
+    A platform of an optional section, such as the valve, is only included
+    once a device whose model supports it reports that section.
+    """
+    data = coordinator.data or {}
+    platforms = set(REQUIRED_PLATFORMS)
+    for device in coordinator.devices:
+        device_data = data.get(device.id)
+        for platform in platforms_for([device.model]) - platforms:
+            section = OPTIONAL_PLATFORM_SECTIONS.get(platform)
+            if section is None or (
+                device_data is not None and getattr(device_data, section) is not None
+            ):
+                platforms.add(platform)
+    return platforms
+
+
+async def _async_forward_platforms(
+    hass: HomeAssistant, entry: ConfigEntry, organization: QuandifyOrganization
+) -> None:
+    """Forward only the platforms the organization's devices use.
+
+    Platforms needed by devices found later, or by a section a device starts
+    to report, are forwarded when they appear.
+    """
+    coordinator = organization.coordinator
+    organization.platforms = _platforms_in_use(coordinator)
+    await hass.config_entries.async_forward_entry_setups(
+        entry, sorted(organization.platforms)
+    )
+
+    @callback
+    def _async_forward_new_platforms() -> None:
+        """Forward platforms that are in use but not loaded yet."""
+        missing = _platforms_in_use(coordinator) - organization.platforms
+        if not missing:
+            return
+        organization.platforms |= missing
+        entry.async_create_background_task(
+            hass,
+            hass.config_entries.async_forward_entry_setups(entry, sorted(missing)),
+            f"{DOMAIN} forward {', '.join(sorted(missing))}",
+        )
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_forward_new_platforms))
+
+
+@callback
+def _async_add_member(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: QuandifyDataUpdateCoordinator
+) -> None:
+    """Add the account of a non-owner entry to its organization's coordinator."""
+    api = QuandifyAPI(
+        coordinator.api.session,
+        dict(entry.data),
+        on_token_refresh=_async_token_saver(hass, entry),
+        metrics=coordinator.api.metrics,
+    )
+    coordinator.async_add_member(entry.entry_id, api)
+    entry.async_create_background_task(
+        hass, coordinator.async_discover_devices(), f"{DOMAIN} device discovery"
+    )
+
+
+def _async_token_saver(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Callable[[dict[str, Any]], None]:
+    """Return a callback that stores refreshed tokens in a config entry."""
+
+    @callback
+    def _async_store_tokens(tokens: dict[str, Any]) -> None:
+        """Persist refreshed tokens so a restart does not start from a stale token."""
+        hass.config_entries.async_update_entry(entry, data={**entry.data, **tokens})
+
+    return _async_store_tokens
+
+
+async def _async_setup_coordinator(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> QuandifyDataUpdateCoordinator:
+    """Create the coordinator of an organization, with the entry's credentials."""
+    max_parallel_requests = entry.options.get(
+        CONF_MAX_PARALLEL_REQUESTS, DEFAULT_MAX_PARALLEL_REQUESTS
+    )
+    if entry.options.get(CONF_DEDICATED_SESSION, DEFAULT_DEDICATED_SESSION):
+        session = _create_session(max_parallel_requests)
+        # Also runs when setup fails, so the session never leaks.
+        entry.async_on_unload(session.close)
+
+        async def _async_close_session(_: Event) -> None:
+            await session.close()
+
+        # Config entries are not unloaded when Home Assistant stops.
+        entry.async_on_unload(
+            hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_CLOSE, _async_close_session
+            )
+        )
+    else:
+        session = async_get_clientsession(hass)
+
+    api = QuandifyAPI(
+        session, dict(entry.data), on_token_refresh=_async_token_saver(hass, entry)
+    )
+
+    store = QuandifyStore(hass, entry.entry_id)
+    if (cached := await store.async_load()) is not None:
+        # Start from the last snapshot and refresh in the background, so setup
+        # does not wait on (or fail because of) the cloud.
+        devices, snapshot, flow = cached
+    else:
+        snapshot = None
+        try:
+            raw_devices = await api.get_devices()
+            devices = []
+            for device_data in raw_devices:
+                device = QuandifyDevice.from_api(device_data)
+                if device is not None:
+                    devices.append(device)
+
+        except (aiohttp.ClientError, ValueError, QuandifyAPIError) as err:
+            _LOGGER.error("Failed to set up Quandify integration during device fetch: %s", err)
+            raise ConfigEntryNotReady(f"Failed to get devices: {err}") from err
+
+    coordinator = QuandifyDataUpdateCoordinator(
+        hass,
+        api,
+        devices,
+        max_parallel_requests=max_parallel_requests,
+        device_timeout=entry.options.get(
+            CONF_DEVICE_TIMEOUT, DEFAULT_DEVICE_TIMEOUT_SECONDS
+        ),
+        stale_after=timedelta(
+            minutes=entry.options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER_MINUTES)
+        ),
+    )
+    if snapshot is not None:
+        coordinator.async_set_cached_data(snapshot, flow)
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} initial refresh"
+        )
+        # The stored device list may be out of date.
+        entry.async_create_background_task(
+            hass, coordinator.async_discover_devices(), f"{DOMAIN} device discovery"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(coordinator.async_shutdown)
+    coordinator.async_start_discovery()
+    coordinator.async_start_leak_polling()
+    saved_devices = coordinator.devices
+
+    @callback
+    def _async_save_snapshot() -> None:
+        """Save the snapshot when devices, their data or their flow changed."""
+        nonlocal saved_devices
+        # Scheduler ticks with nothing due also notify listeners.
+        if not coordinator.device_changes and coordinator.devices is saved_devices:
+            return
+        saved_devices = coordinator.devices
+        store.async_save(coordinator.devices, coordinator.data, coordinator.flow)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_save_snapshot))
+    if entry.options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES):
+        coordinator.async_start_push()
+
+    if "recorder" in hass.config.components:
+        importer = QuandifyStatisticsImporter(hass, coordinator.api_for)
+
+        async def _async_import_statistics(*_: Any) -> None:
+            await importer.async_import(coordinator.devices)
+
+        entry.async_create_background_task(
+            hass, _async_import_statistics(), f"{DOMAIN} statistics import"
+        )
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass,
+                _async_import_statistics,
+                timedelta(hours=STATISTICS_IMPORT_INTERVAL_HOURS),
+                name=f"{DOMAIN} statistics import",
+            )
+        )
+
+    return coordinator
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    """Unload a config entry, releasing its reference to the shared coordinator.
+
+    When the owner unloads, the remaining entries of the organization are
+    reloaded so one of them takes over polling and the entities.
+    """
+    organizations: dict[str, QuandifyOrganization] = hass.data[DATA_ORGANIZATIONS]
+    organization_id = _organization_id(entry)
+    organization = organizations.get(organization_id)
+    is_owner = (
+        organization is not None and organization.owner_entry_id == entry.entry_id
+    )
+
+    if is_owner and not await hass.config_entries.async_unload_platforms(
+        entry, sorted(organization.platforms)
+    ):
+        return False
+
+    hass.data[DOMAIN].pop(entry.entry_id)
+    if organization is None or entry.entry_id not in organization.entry_ids:
+        # The organization was already handed over to a new owner.
+        return True
+
+    organization.entry_ids.discard(entry.entry_id)
+    if not is_owner:
+        organization.coordinator.async_remove_member(entry.entry_id)
+    else:
+        # The coordinator shuts down with the owner entry.
+        del organizations[organization_id]
+        for entry_id in organization.entry_ids:
+            hass.async_create_task(hass.config_entries.async_reload(entry_id))
+
+    return True
 
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
 
-    return unload_ok
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot and the devices only this account could see."""
+    organizations: dict[str, QuandifyOrganization] = hass.data.get(
+        DATA_ORGANIZATIONS, {}
+    )
+    if (
+        organization := organizations.get(_organization_id(entry))
+    ) is not None and organization.owner_entry_id != entry.entry_id:
+        organization.coordinator.async_purge_member(entry.entry_id)
+    await QuandifyStore(hass, entry.entry_id).async_remove()
@@ -1,12 +1,28 @@
 """Quandify API client."""
 
+import asyncio
+import base64
+import json
 import logging
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any
+from urllib.parse import urlsplit
 
 import aiohttp
 from homeassistant.exceptions import ConfigEntryAuthFailed
 
-from .const import API_BASE_URL, AUTH_BASE_URL
+from .const import (
+    API_BASE_URL,
+    AUTH_BASE_URL,
+    BULK_PAGE_SIZE,
+    HISTORY_PAGE_SIZE,
+    PUSH_HEARTBEAT_TIMEOUT_SECONDS,
+    REQUEST_MAX_RETRIES,
+    TOKEN_REFRESH_MARGIN_SECONDS,
+)
 from .const import (
     CONF_ACCOUNT_ID,
     CONF_ID_TOKEN,
@@ -14,20 +30,136 @@ from .const import (
     CONF_ORGANIZATION_ID,
 )
 
+from .metrics import QuandifyMetrics, endpoint_name
+from .models import QuandifyDevice, QuandifyDeviceData
+from .scheduler import (
+    RequestScheduler,
+    backoff_delay,
+    get_request_scheduler,
+    parse_retry_after,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - Home Assistant ships orjson
+    orjson = None
+
 _LOGGER = logging.getLogger(__name__)
 
 
+def json_loads(data: bytes | str) -> Any:
+    """Decode JSON with orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class QuandifyAPIError(Exception):
     """Generic Quandify API exception."""
 
 
+class QuandifyBulkUnsupported(QuandifyAPIError):
+    """The bulk device status endpoint is not available."""
+
+
+class QuandifyHistoryUnsupported(QuandifyAPIError):
+    """The consumption history endpoint is not available."""
+
+
+class QuandifyDeltaUnsupported(QuandifyAPIError):
+    """Incremental device sync is not available."""
+
+
+class QuandifyCursorExpired(QuandifyAPIError):
+    """The sync cursor was rejected; a full resync is needed."""
+
+
+@dataclass
+class CachedResponse:
+    """A parsed response body together with its cache validators."""
+
+    etag: str | None
+    last_modified: str | None
+    body: Any
+
+
+def token_expiry(token: str | None) -> float | None:
+    """Return the `exp` claim of a JWT as a UNIX timestamp, if present.
+
+    The signature is not verified; the claim is only used to schedule refreshes.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json_loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _project_device_list(body: Any) -> Any:
+    """Reduce a device list response to the fields QuandifyDevice reads."""
+    if not isinstance(body, dict) or not isinstance(body.get("data"), list):
+        return body
+    return {**body, "data": [QuandifyDevice.project(device) for device in body["data"]]}
+
+
+def _project_device_status(body: Any) -> Any:
+    """Reduce a bulk status response to the fields QuandifyDeviceData reads."""
+    if not isinstance(body, dict) or not isinstance(body.get("data"), list):
+        return body
+    return {
+        **body,
+        "data": [QuandifyDeviceData.project(device) for device in body["data"]],
+    }
+
+
+def _project_leak_status(body: Any) -> Any:
+    """Reduce a bulk status response to the leak status of each device."""
+    if not isinstance(body, dict) or not isinstance(body.get("data"), list):
+        return body
+    return {
+        **body,
+        "data": [QuandifyDeviceData.project_leak(device) for device in body["data"]],
+    }
+
+
+def _devices_by_id(response: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Return the device objects of a list response by id, skipping malformed ones."""
+    return {
+        device["id"]: device
+        for device in response.get("data") or []
+        if isinstance(device, dict) and isinstance(device.get("id"), str)
+    }
+
+
 class QuandifyAPI:
     """A class for interacting with the Quandify API."""
 
-    def __init__(self, session: aiohttp.ClientSession, config: dict[str, Any]) -> None:
-        """Initialize the API client."""
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        config: dict[str, Any],
+        on_token_refresh: Callable[[dict[str, Any]], None] | None = None,
+        api_base_url: str = API_BASE_URL,
+        auth_base_url: str = AUTH_BASE_URL,
+        scheduler: RequestScheduler | None = None,
+        metrics: QuandifyMetrics | None = None,
+    ) -> None:
+        """Initialize the API client.
+
+        Clients of accounts that share a coordinator pass the same `metrics`.
+        """
         self.session = session
+        self._scheduler = scheduler or get_request_scheduler()
         self._config = config
+        self._api_base_url = api_base_url
+        self._auth_base_url = auth_base_url
+        self._on_token_refresh = on_token_refresh
+        self._refresh_lock = asyncio.Lock()
+        self._response_cache: dict[str, CachedResponse] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.metrics = metrics or QuandifyMetrics()
 
     async def login(self, email: str, password: str) -> dict[str, Any]:
         """Log in to the Quandify API, performing the full authentication flow."""
@@ -45,69 +177,231 @@ class QuandifyAPI:
 
         return self._config
 
-    async def _refresh_token(self) -> bool:
+    @property
+    def token_expires_at(self) -> float | None:
+        """Return when the current id token expires, as a UNIX timestamp."""
+        return token_expiry(self._config.get(CONF_ID_TOKEN))
+
+    async def _ensure_token(self) -> str | None:
+        """Return a usable id token, refreshing it shortly before it expires."""
+        token = self._config.get(CONF_ID_TOKEN)
+        expires_at = token_expiry(token)
+        if (
+            expires_at is not None
+            and time.time() >= expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+        ):
+            _LOGGER.debug("Token is about to expire, refreshing proactively")
+            await self._refresh_token(token)
+            token = self._config.get(CONF_ID_TOKEN)
+        return token
+
+    async def _refresh_token(self, stale_token: str | None) -> bool:
+        """Refresh the authentication token, at most once for a given stale token.
+
+        Concurrent callers wait for the refresh already in progress instead of
+        starting their own.
+        """
+        async with self._refresh_lock:
+            if self._config.get(CONF_ID_TOKEN) != stale_token:
+                # Another caller refreshed the token while we were waiting.
+                return True
+            return await self._async_refresh_token()
+
+    async def _async_refresh_token(self) -> bool:
         """Refresh the authentication token."""
 
-        url = f"{AUTH_BASE_URL}/login/refresh"
+        url = f"{self._auth_base_url}/login/refresh"
         payload = {"refresh_token": self._config.get(CONF_REFRESH_TOKEN)}
 
         try:
             _LOGGER.debug("Attempting to refresh token")
-            response = await self.session.post(url, json=payload)
+            response = await self._send("post", url, json=payload)
             response.raise_for_status()
-            data: dict[str, Any] = await response.json()
+            data: dict[str, Any] = json_loads(await self._read(response))
 
         except aiohttp.ClientError as err:
             _LOGGER.error("Failed to refresh token: %s", err)
             raise ConfigEntryAuthFailed("Failed to refresh token") from err
 
         else:
+            self.metrics.token_refreshes += 1
             self._config[CONF_ID_TOKEN] = data.get("id_token")
             self._config[CONF_REFRESH_TOKEN] = data.get("refresh_token")
+            if self._on_token_refresh is not None:
+                self._on_token_refresh(
+                    {
+                        CONF_ID_TOKEN: self._config[CONF_ID_TOKEN],
+                        CONF_REFRESH_TOKEN: self._config[CONF_REFRESH_TOKEN],
+                    }
+                )
 
         return True
 
+    async def _send(
+        self, method: str, url: str, **kwargs: Any
+    ) -> aiohttp.ClientResponse:
+        """Send a request through the shared scheduler, retrying transient failures.
+
+        429 responses are retried for any method, honoring Retry-After. 5xx
+        responses and connection errors are only retried for GET requests. When
+        retries are exhausted, the last response is returned for the caller to check.
+        """
+        host = urlsplit(url).netloc
+        endpoint = endpoint_name(method, url)
+        idempotent = method.lower() == "get"
+        attempt = 0
+
+        while True:
+            await self._scheduler.acquire(host)
+            delay = backoff_delay(attempt)
+            started = time.perf_counter()
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                self.metrics.record_request(
+                    endpoint, (time.perf_counter() - started) * 1000, None
+                )
+                if not idempotent or attempt >= REQUEST_MAX_RETRIES:
+                    raise
+                _LOGGER.debug("Request to %s failed, retrying: %r", url, err)
+            else:
+                self.metrics.record_request(
+                    endpoint, (time.perf_counter() - started) * 1000, response.status
+                )
+                if response.status == 429:
+                    retry_after = parse_retry_after(
+                        response.headers.get("Retry-After")
+                    )
+                    self._scheduler.defer(
+                        host, delay if retry_after is None else retry_after
+                    )
+                    # The scheduler holds back the next attempt.
+                    delay = 0
+                elif not (response.status >= 500 and idempotent):
+                    return response
+                if attempt >= REQUEST_MAX_RETRIES:
+                    return response
+                _LOGGER.debug(
+                    "Request to %s returned %s, retrying", url, response.status
+                )
+                response.release()
+
+            attempt += 1
+            self.metrics.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _read(self, response: aiohttp.ClientResponse) -> bytes:
+        """Read a response body, counting the bytes received."""
+        raw = await response.read()
+        self.metrics.bytes_received += len(raw)
+        return raw
+
     async def _request(
-        self, method: str, url: str, retry: bool = True, **kwargs: Any
+        self,
+        method: str,
+        url: str,
+        retry: bool = True,
+        transform: Callable[[Any], Any] | None = None,
+        cache: bool = True,
+        **kwargs: Any,
     ) -> dict[str, Any]:
-        """Make an authenticated request to the Quandify API, refreshing the token if needed."""
-
-        headers = {"Authorization": f"Bearer {self._config.get(CONF_ID_TOKEN)}"}
+        """Make an authenticated request to the Quandify API, refreshing the token if needed.
+
+        `transform` is applied to a decoded JSON body before it is returned and
+        cached, so large responses can be reduced to the fields we use. GET
+        responses are cached by their validators unless `cache` is False, as
+        for requests whose parameters never repeat.
+        """
+
+        token = await self._ensure_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        cache_key = self._cache_key(url, kwargs.get("params"))
+        cacheable = cache and method.lower() == "get"
+        cached = None
         response = {}
 
+        if cacheable:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    headers["If-Modified-Since"] = cached.last_modified
+
         try:
-            response = await self.session.request(
-                method, url, headers=headers, **kwargs
-            )
+            response = await self._send(method, url, headers=headers, **kwargs)
+            if response.status == 304 and cached is not None:
+                response.release()
+                self.cache_hits += 1
+                return cached.body
+
             response.raise_for_status()
+            raw = await self._read(response)
             if response.content_type == "application/json":
-                return await response.json()
+                body = json_loads(raw)
+                if transform is not None:
+                    body = transform(body)
             else:
-                return await response.text()
+                body = raw.decode(response.get_encoding())
+
+            if cacheable:
+                self.cache_misses += 1
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if etag or last_modified:
+                    self._response_cache[cache_key] = CachedResponse(
+                        etag, last_modified, body
+                    )
+                else:
+                    self._response_cache.pop(cache_key, None)
+
+            return body
 
         except aiohttp.ClientResponseError as err:
             # Check if the error is 401 Unauthorized and we are allowed to retry once.
             if err.status == 401 and retry:
                 _LOGGER.info("Token expired or invalid, attempting refresh")
-                if await self._refresh_token():
+                if await self._refresh_token(token):
                     _LOGGER.info("Token refreshed, retrying the request")
-                    return await self._request(method, url, retry=False, **kwargs)
+                    return await self._request(
+                        method,
+                        url,
+                        retry=False,
+                        transform=transform,
+                        cache=cache,
+                        **kwargs,
+                    )
 
             raise
 
+    def forget_devices(self, device_ids: set[str]) -> None:
+        """Drop cached responses that mention any of the given devices."""
+        self._response_cache = {
+            key: cached
+            for key, cached in self._response_cache.items()
+            if not any(device_id in key for device_id in device_ids)
+        }
+
+    @staticmethod
+    def _cache_key(url: str, params: dict[str, Any] | None) -> str:
+        """Return the response cache key for a URL and its query parameters."""
+        if not params:
+            return url
+        return f"{url}?{sorted(params.items())}"
+
     async def auth_with_email(self, email: str, password: str) -> dict[str, Any]:
         """Authenticate to the Quandify API."""
-        url = f"{AUTH_BASE_URL}/login/email"
+        url = f"{self._auth_base_url}/login/email"
         payload = {"email": email, "password": password}
         _LOGGER.debug("Attempting to authenticate to %s", url)
-        response = await self.session.post(url, json=payload)
+        response = await self._send("post", url, json=payload)
         response.raise_for_status()
-        return await response.json()
+        return json_loads(await self._read(response))
 
     async def get_organization_id(self) -> str:
         """Fetch account details to get the organizationId."""
         account_id = self._config.get(CONF_ACCOUNT_ID)
-        url = f"{AUTH_BASE_URL}/accounts/{account_id}"
+        url = f"{self._auth_base_url}/accounts/{account_id}"
         response = await self._request("get", url)
         organization_id = response.get("organizationId")
 
@@ -119,21 +413,180 @@ class QuandifyAPI:
     async def get_devices(self) -> list[dict[str, Any]]:
         """Fetch the list of devices."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
-        url = f"{API_BASE_URL}/organization/{organization_id}/devices/"
-        response = await self._request("get", url)
+        url = f"{self._api_base_url}/organization/{organization_id}/devices/"
+        response = await self._request("get", url, transform=_project_device_list)
         return response.get("data", [])
 
     async def get_device_info(self, device_id: str) -> dict[str, Any]:
         """Get all info for a single device."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
-        url = f"{API_BASE_URL}/organization/{organization_id}/devices/{device_id}"
-        return await self._request("get", url)
+        url = f"{self._api_base_url}/organization/{organization_id}/devices/{device_id}"
+        return await self._request("get", url, transform=QuandifyDeviceData.project)
+
+    async def get_devices_status(
+        self, device_ids: list[str]
+    ) -> dict[str, dict[str, Any]]:
+        """Get all info for many devices in as few requests as possible.
+
+        Raises QuandifyBulkUnsupported if the cloud does not offer the endpoint.
+        """
+        # The scheduler asks for a different set of due devices almost every
+        # time, so cached responses would rarely be reused and only pile up.
+        return await self._get_bulk_status(
+            device_ids, _project_device_status, cache=False
+        )
+
+    async def get_device_changes(
+        self, cursor: str | None
+    ) -> tuple[dict[str, dict[str, Any]], str]:
+        """Get the devices whose status changed after a sync cursor.
+
+        Without a cursor, every device is returned. Returns the (possibly
+        partial) changed device objects by id and the cursor for the next call.
+        Raises QuandifyCursorExpired if the cloud rejects the cursor and
+        QuandifyDeltaUnsupported if it does not offer incremental sync.
+        """
+        organization_id = self._config.get(CONF_ORGANIZATION_ID)
+        url = f"{self._api_base_url}/organization/{organization_id}/devices/status"
+        params: dict[str, Any] = {"limit": BULK_PAGE_SIZE}
+        if cursor is not None:
+            params["since"] = cursor
+        devices: dict[str, dict[str, Any]] = {}
+        next_cursor: str | None = None
+
+        page: int | None = 1
+        while page is not None:
+            try:
+                # Cursors never repeat, so caching the responses would only grow
+                # the cache.
+                response = await self._request(
+                    "get",
+                    url,
+                    transform=_project_device_status,
+                    cache=False,
+                    params={**params, "page": page},
+                )
+            except aiohttp.ClientResponseError as err:
+                if err.status in (400, 409, 410) and cursor is not None:
+                    raise QuandifyCursorExpired(
+                        f"Sync cursor was rejected: {err.status}"
+                    ) from err
+                if err.status in (404, 405, 501):
+                    raise QuandifyDeltaUnsupported(
+                        f"Incremental sync is not supported: {err.status}"
+                    ) from err
+                raise
+            except ValueError as err:
+                raise QuandifyAPIError(f"Invalid device changes: {err}") from err
+            if not isinstance(response, dict) or not response.get("cursor"):
+                raise QuandifyDeltaUnsupported("Response has no sync cursor")
+
+            devices.update(_devices_by_id(response))
+            # The cursor of the last page covers everything returned.
+            next_cursor = response["cursor"]
+            page = response.get("next_page")
+
+        return devices, next_cursor
+
+    async def get_leak_states(
+        self, device_ids: list[str]
+    ) -> dict[str, dict[str, Any]]:
+        """Get only the leak status of many devices, for high frequency polling.
+
+        The cloud is asked for the leak fields alone, and anything else it
+        returns is dropped before parsing. Raises QuandifyBulkUnsupported if
+        the cloud does not offer the bulk endpoint.
+        """
+        return await self._get_bulk_status(
+            device_ids, _project_leak_status, {"fields": "id,leak_status"}
+        )
+
+    async def _get_bulk_status(
+        self,
+        device_ids: list[str],
+        transform: Callable[[Any], Any],
+        extra_params: dict[str, Any] | None = None,
+        cache: bool = True,
+    ) -> dict[str, dict[str, Any]]:
+        """Fetch the bulk status endpoint page by page, keyed by device id."""
+        organization_id = self._config.get(CONF_ORGANIZATION_ID)
+        url = f"{self._api_base_url}/organization/{organization_id}/devices/status"
+        devices: dict[str, dict[str, Any]] = {}
+
+        for start in range(0, len(device_ids), BULK_PAGE_SIZE):
+            params = {
+                **(extra_params or {}),
+                "ids": ",".join(device_ids[start : start + BULK_PAGE_SIZE]),
+                "limit": BULK_PAGE_SIZE,
+            }
+            page: int | None = 1
+            while page is not None:
+                try:
+                    response = await self._request(
+                        "get",
+                        url,
+                        transform=transform,
+                        cache=cache,
+                        params={**params, "page": page},
+                    )
+                except aiohttp.ClientResponseError as err:
+                    if err.status in (404, 405, 501):
+                        raise QuandifyBulkUnsupported(
+                            f"Bulk device status is not supported: {err.status}"
+                        ) from err
+                    raise
+                except ValueError as err:
+                    raise QuandifyAPIError(f"Invalid bulk status: {err}") from err
+                if not isinstance(response, dict):
+                    raise QuandifyBulkUnsupported("Unexpected bulk status response")
+
+                devices.update(_devices_by_id(response))
+                page = response.get("next_page")
+
+        return devices
+
+    async def iter_consumption_history(
+        self, device_id: str, start: datetime, end: datetime
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield pages of hourly consumption for a device, oldest first.
+
+        Raises QuandifyHistoryUnsupported if the cloud does not offer the endpoint.
+        """
+        organization_id = self._config.get(CONF_ORGANIZATION_ID)
+        url = (
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
+            f"{device_id}/consumption"
+        )
+        params = {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "resolution": "hour",
+            "limit": HISTORY_PAGE_SIZE,
+        }
+        page: int | None = 1
+        while page is not None:
+            try:
+                # The window moves every run, so responses are never reused.
+                response = await self._request(
+                    "get", url, cache=False, params={**params, "page": page}
+                )
+            except aiohttp.ClientResponseError as err:
+                if err.status in (404, 405, 501):
+                    raise QuandifyHistoryUnsupported(
+                        f"Consumption history is not supported: {err.status}"
+                    ) from err
+                raise
+            if not isinstance(response, dict):
+                raise QuandifyHistoryUnsupported("Unexpected consumption response")
+
+            yield response.get("data", [])
+            page = response.get("next_page")
 
     async def acknowledge_leak(self, device_id: str) -> None:
         """Acknowledge a leak."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
             f"{device_id}/commands/acknowledge-alarm"
         )
         await self._request("post", url)
@@ -142,7 +595,7 @@ class QuandifyAPI:
         """Open the valve on a device."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
             f"{device_id}/commands/open-valve"
         )
         await self._request("post", url)
@@ -151,7 +604,49 @@ class QuandifyAPI:
         """Close the valve on a device."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
             f"{device_id}/commands/close-valve"
         )
         await self._request("post", url)
+
+    async def stream_device_updates(self) -> AsyncIterator[dict[str, Any]]:
+        """Subscribe to the server-sent event stream of device updates.
+
+        Yields one (possibly partial) device object per event. The iterator ends
+        when the server closes the stream; a missing heartbeat raises a timeout.
+        """
+        organization_id = self._config.get(CONF_ORGANIZATION_ID)
+        url = f"{self._api_base_url}/organization/{organization_id}/devices/stream"
+        token = await self._ensure_token()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "text/event-stream",
+        }
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_read=PUSH_HEARTBEAT_TIMEOUT_SECONDS
+        )
+
+        await self._scheduler.acquire(urlsplit(url).netloc)
+        async with self.session.get(url, headers=headers, timeout=timeout) as response:
+            if response.status == 401:
+                # Refresh now so the caller's reconnect uses a valid token.
+                await self._refresh_token(token)
+            response.raise_for_status()
+
+            data_lines: list[str] = []
+            async for raw_line in response.content:
+                self.metrics.bytes_received += len(raw_line)
+                line = raw_line.decode("utf-8").rstrip("\r\n")
+                if not line:
+                    if data_lines:
+                        update = json_loads("\n".join(data_lines))
+                        data_lines.clear()
+                        if isinstance(update, dict) and "id" in update:
+                            yield update
+                    continue
+                if line.startswith(":"):
+                    # Comment lines are used as keep-alive heartbeats.
+                    continue
+                field, _, value = line.partition(":")
+                if field == "data":
+                    data_lines.append(value.removeprefix(" "))
@@ -1,4 +1,7 @@
 """Binary sensor platform for Quandify integration."""
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
 
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
@@ -9,22 +12,37 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .capabilities import entity_keys
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
-from .entity import QuandifyEntity
+from .entity import QuandifyEntity, compile_value_fn
 from .models import QuandifyDevice
 
+
+@dataclass(frozen=True, kw_only=True)
+class QuandifyBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Describes a Quandify binary sensor and how to map its raw value to on/off."""
+
+    transform: Callable[[Any], bool | None]
+
+
+def _is_leak(value: Any) -> bool | None:
+    """Map the leak state to a boolean, or None if the device did not report one."""
+    if value is None:
+        return None
+    return value != "noLeak"
+
+
 # Binary Sensor descriptions
-LEAK_SENSOR = BinarySensorEntityDescription(
+LEAK_SENSOR = QuandifyBinarySensorEntityDescription(
     key="leak_status.leak_state",
     name="Leak",
     device_class=BinarySensorDeviceClass.MOISTURE,
+    transform=_is_leak,
 )
 
-# Binary Sensor profiles
-DEVICE_BINARY_SENSORS = {
-    "Water Grip": [LEAK_SENSOR],
-}
+# Binary Sensor descriptions by key, as referenced by the capability registry
+BINARY_SENSORS = {description.key: description for description in (LEAK_SENSOR,)}
 
 
 async def async_setup_entry(
@@ -32,29 +50,38 @@ async def async_setup_entry(
 ) -> None:
     """Set up the binary sensor entities."""
     coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[QuandifyBinarySensor] = []
 
-    for device in coordinator.devices:
-        if descriptions := DEVICE_BINARY_SENSORS.get(device.model):
+    @callback
+    def _async_add_devices(devices: list[QuandifyDevice]) -> None:
+        entities: list[QuandifyBinarySensor] = []
+        for device in devices:
             entities.extend(
-                QuandifyBinarySensor(coordinator, device, description)
-                for description in descriptions
+                QuandifyBinarySensor(coordinator, device, BINARY_SENSORS[key])
+                for key in entity_keys(device.model, "binary_sensor")
             )
-    async_add_entities(entities)
+        async_add_entities(entities)
+
+    _async_add_devices(coordinator.devices)
+    entry.async_on_unload(
+        coordinator.async_add_new_devices_listener(_async_add_devices)
+    )
 
 
 class QuandifyBinarySensor(QuandifyEntity, BinarySensorEntity):
     """Implementation of a Quandify binary sensor."""
 
+    entity_description: QuandifyBinarySensorEntityDescription
+
     def __init__(
         self,
         coordinator: QuandifyDataUpdateCoordinator,
         device: QuandifyDevice,
-        description: BinarySensorEntityDescription,
+        description: QuandifyBinarySensorEntityDescription,
     ):
         """Initialize the binary sensor."""
-        super().__init__(coordinator, device)
+        super().__init__(coordinator, device, description.key)
         self.entity_description = description
+        self._value_fn = compile_value_fn(description.key, description.transform)
         self._attr_unique_id = f"{self.device.id}_{self.entity_description.key}"
         self._update_attr()
 
@@ -66,17 +93,4 @@ class QuandifyBinarySensor(QuandifyEntity, BinarySensorEntity):
 
     def _update_attr(self) -> None:
         """Update the state of the binary sensor."""
-        value = self.device_data
-        if value is None:
-            self._attr_is_on = None
-            return
-
-        try:
-            for key_part in self.entity_description.key.split("."):
-                if value is None:
-                    break
-                value = value.get(key_part)
-        except AttributeError:
-            value = None
-
-        self._attr_is_on = value != "noLeak"
+        self._attr_is_on = self._value_fn(self.device_data)
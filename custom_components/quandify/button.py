@@ -1,46 +1,59 @@
 """Button platform for Quandify integration."""
 import logging
-import aiohttp
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .capabilities import entity_keys
+from .commands import QuandifyCommand
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
-from .entity import QuandifyEntity
+from .entity import QuandifyCommandEntity
 from .models import QuandifyDevice
 
 _LOGGER = logging.getLogger(__name__)
 
-DEVICE_BUTTONS = {
-    "Water Grip": ["acknowledge"],
-}
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up the button entities based on device class."""
     coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[ButtonEntity] = []
 
-    for device in coordinator.devices:
-        if button_types := DEVICE_BUTTONS.get(device.model):
-            if "acknowledge" in button_types:
-                entities.append(QuandifyAcknowledgeLeakButton(coordinator, device))
-            if "open_valve" in button_types:
-                entities.append(QuandifyOpenValveButton(coordinator, device))
-            if "close_valve" in button_types:
-                entities.append(QuandifyCloseValveButton(coordinator, device))
+    @callback
+    def _async_add_devices(devices: list[QuandifyDevice]) -> None:
+        async_add_entities(
+            BUTTONS[key](coordinator, device)
+            for device in devices
+            for key in entity_keys(device.model, "button")
+        )
 
-    async_add_entities(entities)
+    _async_add_devices(coordinator.devices)
+    entry.async_on_unload(coordinator.async_add_new_devices_listener(_async_add_devices))
 
 
-class QuandifyButton(QuandifyEntity, ButtonEntity):
+class QuandifyButton(QuandifyCommandEntity, ButtonEntity):
     """Base button entity for all Quandify devices."""
     _attr_entity_category = EntityCategory.CONFIG
 
     def press(self) -> None:
         pass
+
+    async def _async_send(self, command: QuandifyCommand) -> bool:
+        """Send a command through the queue and report whether it succeeded."""
+        result = await self.coordinator.async_send_command(self.device.id, command)
+        self.async_write_ha_state()
+        if not result.success:
+            _LOGGER.error(
+                "Command %s for device %s failed after %d attempt(s): %s",
+                command,
+                self.device.id,
+                result.attempts,
+                result.error,
+            )
+        return result.success
+
+
 class QuandifyAcknowledgeLeakButton(QuandifyButton):
     """Represents the acknowledge leak button."""
     _attr_name = "Acknowledge leak"
@@ -54,10 +67,7 @@ class QuandifyAcknowledgeLeakButton(QuandifyButton):
     async def async_press(self) -> None:
         """Handle the button press."""
         _LOGGER.info("Acknowledging leak for device %s", self.device.id)
-        try:
-            await self.coordinator.api.acknowledge_leak(self.device.id)
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Failed to acknowledge leak: %s", err)
+        await self._async_send(QuandifyCommand.ACKNOWLEDGE_LEAK)
 
 
 class QuandifyOpenValveButton(QuandifyButton):
@@ -73,12 +83,11 @@ class QuandifyOpenValveButton(QuandifyButton):
     async def async_press(self) -> None:
         """Handle the button press."""
         _LOGGER.info("Opening valve for device %s", self.device.id)
-        try:
-            await self.coordinator.api.open_valve(self.device.id)
-            # After a command, request a refresh to get the new state
-            await self.coordinator.async_request_refresh()
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Failed to open valve: %s", err)
+        if await self._async_send(QuandifyCommand.OPEN_VALVE):
+            # After a command, poll this device quickly until the new state shows up
+            await self.coordinator.async_request_device_refresh(
+                self.device.id, command_pending=True
+            )
 
 
 class QuandifyCloseValveButton(QuandifyButton):
@@ -94,9 +103,16 @@ class QuandifyCloseValveButton(QuandifyButton):
     async def async_press(self) -> None:
         """Handle the button press."""
         _LOGGER.info("Closing valve for device %s", self.device.id)
-        try:
-            await self.coordinator.api.close_valve(self.device.id)
-            # After a command, request a refresh to get the new state
-            await self.coordinator.async_request_refresh()
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Failed to close valve: %s", err)
+        if await self._async_send(QuandifyCommand.CLOSE_VALVE):
+            # After a command, poll this device quickly until the new state shows up
+            await self.coordinator.async_request_device_refresh(
+                self.device.id, command_pending=True
+            )
+
+
+# Button classes by key, as referenced by the capability registry
+BUTTONS: dict[str, type[QuandifyButton]] = {
+    "acknowledge": QuandifyAcknowledgeLeakButton,
+    "open_valve": QuandifyOpenValveButton,
+    "close_valve": QuandifyCloseValveButton,
+}
@@ -0,0 +1,74 @@
+"""Quandify device models and the entities each of them provides."""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class QuandifyModel:
+    """A device model and the entity description keys it uses, by platform.
+
+    Keys refer to the descriptions defined in each platform module, so the
+    registry can be read without importing any platform.
+    """
+
+    name: str
+    entities: dict[str, tuple[str, ...]]
+
+    @property
+    def platforms(self) -> set[str]:
+        """Return the platforms this model has entities on."""
+        return {platform for platform, keys in self.entities.items() if keys}
+
+
+WATER_GRIP = QuandifyModel(
+    name="Water Grip",
+    entities={
+        "sensor": (
+            "status.total_volume",
+            "status.avg_water_temp",
+            "status.wifi_signal_strength",
+            "sub_type",
+        ),
+        "binary_sensor": ("leak_status.leak_state",),
+        "button": ("acknowledge",),
+        # Only created for devices that report a valve.
+        "valve": ("valve",),
+    },
+)
+
+# (API device type, hardware version) to model. Only pairs confirmed against
+# the cloud's device list belong here; other devices are ignored.
+MODELS: dict[tuple[str, int], QuandifyModel] = {
+    ("waterfuse", 5): WATER_GRIP,
+}
+
+# Platforms whose entities need an optional section of the device data. They
+# are only loaded once a device reports that section.
+OPTIONAL_PLATFORM_SECTIONS = {"valve": "valve"}
+
+_MODELS_BY_NAME = {model.name: model for model in MODELS.values()}
+
+
+def model_for(
+    device_type: str | None, hardware_version: int | None
+) -> QuandifyModel | None:
+    """Return the model of a device, or None if it is not supported."""
+    return MODELS.get((device_type, hardware_version))
+
+
+def entity_keys(model_name: str, platform: str) -> tuple[str, ...]:
+    """Return the entity description keys of a model on a platform."""
+    if (model := _MODELS_BY_NAME.get(model_name)) is None:
+        return ()
+    return model.entities.get(platform, ())
+
+
+def platforms_for(model_names: Iterable[str]) -> set[str]:
+    """Return the platforms used by any of the given models."""
+    return {
+        platform
+        for name in set(model_names)
+        if (model := _MODELS_BY_NAME.get(name)) is not None
+        for platform in model.platforms
+    }
@@ -0,0 +1,180 @@
+"""Device command queue for the Quandify integration."""
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
+import logging
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.util import dt as dt_util
+
+from .api import QuandifyAPI, QuandifyAPIError
+from .const import COMMAND_MAX_ATTEMPTS
+from .scheduler import backoff_delay
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QuandifyCommand(StrEnum):
+    """Commands that can be sent to a device."""
+
+    ACKNOWLEDGE_LEAK = "acknowledge_leak"
+    OPEN_VALVE = "open_valve"
+    CLOSE_VALVE = "close_valve"
+
+
+# Commands in the same group supersede each other; only the latest is sent.
+_COMMAND_GROUPS = {
+    QuandifyCommand.ACKNOWLEDGE_LEAK: "acknowledge",
+    QuandifyCommand.OPEN_VALVE: "valve",
+    QuandifyCommand.CLOSE_VALVE: "valve",
+}
+
+
+@dataclass(slots=True)
+class CommandResult:
+    """The outcome of a device command."""
+
+    command: QuandifyCommand
+    success: bool
+    attempts: int
+    finished_at: datetime
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class _QueuedCommand:
+    """A command waiting to be sent, with everyone waiting for its result."""
+
+    command: QuandifyCommand
+    waiters: list[asyncio.Future[CommandResult]]
+
+
+class QuandifyCommandQueue:
+    """Sends commands per device in order, coalescing and retrying them.
+
+    A queued command is replaced by a later one of the same group, so open
+    followed by close only sends close. A repeat of the command that is being
+    sent waits for that one and drops any queued command of its group.
+    Waiters get the result of the command that was sent instead of theirs,
+    so they can tell from `CommandResult.command` that theirs was replaced.
+    Commands that could not reach the cloud are retried with backoff.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_for: Callable[[str], QuandifyAPI],
+        on_result: Callable[[str, CommandResult], None],
+    ) -> None:
+        """Initialize the queue. `api_for` returns the client to use per device."""
+        self.hass = hass
+        self.api_for = api_for
+        self._on_result = on_result
+        self._queued: dict[str, dict[str, _QueuedCommand]] = {}
+        self._in_flight: dict[str, _QueuedCommand] = {}
+        self._workers: dict[str, asyncio.Task[None]] = {}
+
+    async def async_send(self, device_id: str, command: QuandifyCommand) -> CommandResult:
+        """Queue a command and wait for its (or its replacement's) result."""
+        waiter: asyncio.Future[CommandResult] = self.hass.loop.create_future()
+        group = _COMMAND_GROUPS[command]
+        queued = self._queued.setdefault(device_id, {})
+
+        if (
+            in_flight := self._in_flight.get(device_id)
+        ) is not None and in_flight.command == command:
+            if (superseded := queued.pop(group, None)) is not None:
+                # Sending the command in flight already leaves the device in
+                # the requested state, so the queued one is not needed.
+                _LOGGER.debug(
+                    "Dropping %s for device %s, %s is being sent",
+                    superseded.command,
+                    device_id,
+                    command,
+                )
+                in_flight.waiters.extend(superseded.waiters)
+            in_flight.waiters.append(waiter)
+        elif (pending := queued.get(group)) is not None:
+            _LOGGER.debug(
+                "Coalescing %s into %s for device %s", pending.command, command, device_id
+            )
+            pending.command = command
+            pending.waiters.append(waiter)
+        else:
+            queued[group] = _QueuedCommand(command, [waiter])
+
+        if device_id not in self._workers:
+            self._workers[device_id] = self.hass.async_create_background_task(
+                self._async_worker(device_id), f"quandify commands {device_id}"
+            )
+        return await asyncio.shield(waiter)
+
+    def async_cancel(self) -> None:
+        """Stop all workers, e.g. when the config entry is unloaded."""
+        for worker in self._workers.values():
+            worker.cancel()
+
+    async def _async_worker(self, device_id: str) -> None:
+        """Send the queued commands of one device, one at a time."""
+        try:
+            while queued := self._queued.get(device_id):
+                group = next(iter(queued))
+                item = self._in_flight[device_id] = queued.pop(group)
+                result = await self._async_execute(device_id, item.command)
+                del self._in_flight[device_id]
+                for waiter in item.waiters:
+                    if not waiter.done():
+                        waiter.set_result(result)
+                self._on_result(device_id, result)
+        finally:
+            # If the worker was cancelled, release anyone still waiting.
+            abandoned = list(self._queued.pop(device_id, {}).values())
+            if (in_flight := self._in_flight.pop(device_id, None)) is not None:
+                abandoned.append(in_flight)
+            for item in abandoned:
+                for waiter in item.waiters:
+                    waiter.cancel()
+            self._workers.pop(device_id, None)
+
+    async def _async_execute(
+        self, device_id: str, command: QuandifyCommand
+    ) -> CommandResult:
+        """Send a command, retrying only while the cloud cannot be reached.
+
+        Commands may not be idempotent, so failures after the request was sent,
+        such as 5xx responses and timeouts, are not retried.
+        """
+        send = getattr(self.api_for(device_id), command.value)
+        error: Exception | None = None
+        for attempt in range(1, COMMAND_MAX_ATTEMPTS + 1):
+            try:
+                await send(device_id)
+            except aiohttp.ClientConnectorError as err:
+                # The request never reached the cloud, so sending it again is safe.
+                error, transient = err, True
+            except (
+                aiohttp.ClientError,
+                TimeoutError,
+                QuandifyAPIError,
+                ConfigEntryAuthFailed,
+            ) as err:
+                # The cloud may already have applied the command. Rate limiting
+                # is retried by the API client.
+                error, transient = err, False
+            else:
+                return CommandResult(command, True, attempt, dt_util.utcnow())
+
+            if not transient or attempt == COMMAND_MAX_ATTEMPTS:
+                break
+            _LOGGER.debug(
+                "Command %s for device %s failed, retrying: %r", command, device_id, error
+            )
+            await asyncio.sleep(backoff_delay(attempt))
+
+        _LOGGER.error("Command %s for device %s failed: %s", command, device_id, error)
+        return CommandResult(command, False, attempt, dt_util.utcnow(), str(error))
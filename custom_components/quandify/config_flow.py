@@ -8,10 +8,25 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .api import QuandifyAPI, QuandifyAPIError
-from .const import CONF_EMAIL, CONF_PASSWORD, DOMAIN
+from .const import (
+    CONF_DEDICATED_SESSION,
+    CONF_DEVICE_TIMEOUT,
+    CONF_EMAIL,
+    CONF_MAX_PARALLEL_REQUESTS,
+    CONF_PASSWORD,
+    CONF_PUSH_UPDATES,
+    CONF_STALE_AFTER,
+    DEFAULT_DEDICATED_SESSION,
+    DEFAULT_DEVICE_TIMEOUT_SECONDS,
+    DEFAULT_MAX_PARALLEL_REQUESTS,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_STALE_AFTER_MINUTES,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +36,14 @@ class QuandifyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return QuandifyOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> dict[str, Any]:
@@ -75,3 +98,67 @@ class QuandifyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
             errors=errors,
         )
+
+
+class QuandifyOptionsFlow(config_entries.OptionsFlow):
+    """Handle Quandify options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Manage the polling options."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        if (
+            coordinator is not None
+            and coordinator.config_entry is not None
+            and coordinator.config_entry.entry_id != self.config_entry.entry_id
+        ):
+            # The entry shares another entry's coordinator, whose options apply.
+            return self.async_abort(
+                reason="shared_coordinator",
+                description_placeholders={"owner": coordinator.config_entry.title},
+            )
+
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_MAX_PARALLEL_REQUESTS,
+                        default=options.get(
+                            CONF_MAX_PARALLEL_REQUESTS, DEFAULT_MAX_PARALLEL_REQUESTS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+                    vol.Optional(
+                        CONF_DEVICE_TIMEOUT,
+                        default=options.get(
+                            CONF_DEVICE_TIMEOUT, DEFAULT_DEVICE_TIMEOUT_SECONDS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+                    vol.Optional(
+                        CONF_STALE_AFTER,
+                        default=options.get(
+                            CONF_STALE_AFTER, DEFAULT_STALE_AFTER_MINUTES
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                    vol.Optional(
+                        CONF_PUSH_UPDATES,
+                        default=options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES),
+                    ): bool,
+                    vol.Optional(
+                        CONF_DEDICATED_SESSION,
+                        default=options.get(
+                            CONF_DEDICATED_SESSION, DEFAULT_DEDICATED_SESSION
+                        ),
+                    ): bool,
+                }
+            ),
+        )
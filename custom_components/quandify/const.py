@@ -5,9 +5,15 @@ from typing import Final
 DOMAIN: Final = "quandify"
 ATTRIBUTION: Final = "Data provided by Quandify"
 
+# hass.data keys for state shared between config entries
+DATA_ORGANIZATIONS: Final = f"{DOMAIN}_organizations"
+DATA_SETUP_LOCKS: Final = f"{DOMAIN}_setup_locks"
+
 # API Endpoints
 AUTH_BASE_URL: Final = "https://auth.prod.quandify.com"
 API_BASE_URL: Final = "https://api.prod.quandify.com"
+BULK_PAGE_SIZE: Final = 100
+HISTORY_PAGE_SIZE: Final = 500
 
 # Configuration Constants
 CONF_EMAIL: Final = "email"
@@ -17,5 +23,70 @@ CONF_REFRESH_TOKEN: Final = "refresh_token"
 CONF_ACCOUNT_ID: Final = "account_id"
 CONF_ORGANIZATION_ID: Final = "organization_id"
 
+# Request scheduling
+RATE_LIMIT_REQUESTS_PER_SECOND: Final = 5
+RATE_LIMIT_BURST: Final = 10
+REQUEST_MAX_RETRIES: Final = 3
+REQUEST_BACKOFF_BASE_SECONDS: Final = 1
+REQUEST_BACKOFF_MAX_SECONDS: Final = 30
+POLL_STAGGER_SECONDS: Final = 7
+
+# Authentication
+TOKEN_REFRESH_MARGIN_SECONDS: Final = 120
+
+# Statistics import
+STATISTICS_IMPORT_INTERVAL_HOURS: Final = 1
+STATISTICS_BACKFILL_DAYS: Final = 30
+STATISTICS_BATCH_SIZE: Final = 500
+
+# Storage
+STORAGE_VERSION: Final = 1
+STORAGE_SAVE_DELAY_SECONDS: Final = 300
+
+# Derived flow sensors; the history holds one sample per resolution for 24 hours
+FLOW_HISTORY_RESOLUTION_MINUTES: Final = 5
+FLOW_HISTORY_SIZE: Final = 24 * 60 // FLOW_HISTORY_RESOLUTION_MINUTES + 1
+
 # Data Update Coordinator
 UPDATE_INTERVAL_MINUTES: Final = 10
+SCHEDULER_TICK_SECONDS: Final = 30
+FAST_POLL_INTERVAL_SECONDS: Final = 60
+LEAK_POLL_INTERVAL_SECONDS: Final = 15
+IDLE_POLL_INTERVAL_MAX_MINUTES: Final = 30
+COMMAND_PENDING_SECONDS: Final = 120
+COMMAND_CONFIRM_INTERVAL_SECONDS: Final = 2
+COMMAND_CONFIRM_TIMEOUT_SECONDS: Final = 60
+COMMAND_MAX_ATTEMPTS: Final = 5
+DISCOVERY_INTERVAL_HOURS: Final = 6
+DISCOVERY_REMOVE_AFTER_MISSES: Final = 3
+CIRCUIT_BREAKER_FAILURES: Final = 3
+CIRCUIT_BREAKER_COOLDOWN_MINUTES: Final = 30
+CIRCUIT_BREAKER_COOLDOWN_MAX_MINUTES: Final = 240
+
+# Events
+EVENT_COMMAND_RESULT: Final = f"{DOMAIN}_command_result"
+EVENT_LEAK_DETECTED: Final = f"{DOMAIN}_leak_detected"
+
+# Options
+CONF_MAX_PARALLEL_REQUESTS: Final = "max_parallel_requests"
+CONF_DEVICE_TIMEOUT: Final = "device_timeout"
+DEFAULT_MAX_PARALLEL_REQUESTS: Final = 4
+DEFAULT_DEVICE_TIMEOUT_SECONDS: Final = 10
+CONF_PUSH_UPDATES: Final = "push_updates"
+DEFAULT_PUSH_UPDATES: Final = False
+CONF_DEDICATED_SESSION: Final = "dedicated_session"
+DEFAULT_DEDICATED_SESSION: Final = False
+CONF_STALE_AFTER: Final = "stale_after"
+DEFAULT_STALE_AFTER_MINUTES: Final = 30
+
+# Dedicated HTTP session
+SESSION_KEEPALIVE_SECONDS: Final = 60
+SESSION_DNS_CACHE_SECONDS: Final = 300
+SESSION_CONNECT_TIMEOUT_SECONDS: Final = 10
+SESSION_READ_TIMEOUT_SECONDS: Final = 30
+
+# Push updates
+PUSH_HEARTBEAT_TIMEOUT_SECONDS: Final = 90
+PUSH_POLL_INTERVAL_MINUTES: Final = 60
+PUSH_RECONNECT_MIN_SECONDS: Final = 5
+PUSH_RECONNECT_MAX_SECONDS: Final = 300
@@ -2,45 +2,1097 @@
 
 import asyncio
 import logging
-from datetime import timedelta
+import math
+import random
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field, is_dataclass, replace
+from datetime import datetime, timedelta
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+import aiohttp
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .api import QuandifyAPI
-from .const import DOMAIN, UPDATE_INTERVAL_MINUTES
-from .models import QuandifyDevice
+from .api import (
+    QuandifyAPI,
+    QuandifyAPIError,
+    QuandifyBulkUnsupported,
+    QuandifyCursorExpired,
+    QuandifyDeltaUnsupported,
+)
+from .commands import CommandResult, QuandifyCommand, QuandifyCommandQueue
+from .const import (
+    BULK_PAGE_SIZE,
+    CIRCUIT_BREAKER_COOLDOWN_MAX_MINUTES,
+    CIRCUIT_BREAKER_COOLDOWN_MINUTES,
+    CIRCUIT_BREAKER_FAILURES,
+    COMMAND_CONFIRM_INTERVAL_SECONDS,
+    COMMAND_CONFIRM_TIMEOUT_SECONDS,
+    COMMAND_PENDING_SECONDS,
+    DEFAULT_DEVICE_TIMEOUT_SECONDS,
+    DEFAULT_MAX_PARALLEL_REQUESTS,
+    DEFAULT_STALE_AFTER_MINUTES,
+    DISCOVERY_INTERVAL_HOURS,
+    DISCOVERY_REMOVE_AFTER_MISSES,
+    DOMAIN,
+    EVENT_COMMAND_RESULT,
+    EVENT_LEAK_DETECTED,
+    FAST_POLL_INTERVAL_SECONDS,
+    IDLE_POLL_INTERVAL_MAX_MINUTES,
+    LEAK_POLL_INTERVAL_SECONDS,
+    PUSH_POLL_INTERVAL_MINUTES,
+    PUSH_RECONNECT_MAX_SECONDS,
+    PUSH_RECONNECT_MIN_SECONDS,
+    SCHEDULER_TICK_SECONDS,
+    UPDATE_INTERVAL_MINUTES,
+)
+from .flow import FLOW_KEY, FlowTracker
+from .models import (
+    QuandifyDevice,
+    QuandifyDeviceData,
+    QuandifyLeakStatus,
+    QuandifyParseError,
+)
+from .scheduler import get_request_scheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class QuandifyDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+@dataclass(slots=True)
+class DeviceHealth:
+    """Poll outcomes of a single device."""
+
+    last_success: datetime | None = None
+    last_failure: datetime | None = None
+    # Start of the current run of failures; None while the device is healthy.
+    failing_since: datetime | None = None
+    consecutive_failures: int = 0
+    successes: int = 0
+    failures: int = 0
+    last_error: str | None = None
+    # While set, the device is not polled until then.
+    circuit_open_until: datetime | None = None
+
+
+class QuandifyDataUpdateCoordinator(
+    DataUpdateCoordinator[dict[str, QuandifyDeviceData]]
+):
     """Class to manage fetching data from the API."""
 
     def __init__(
-        self, hass: HomeAssistant, api: QuandifyAPI, devices: list[QuandifyDevice]
+        self,
+        hass: HomeAssistant,
+        api: QuandifyAPI,
+        devices: list[QuandifyDevice],
+        max_parallel_requests: int = DEFAULT_MAX_PARALLEL_REQUESTS,
+        device_timeout: float = DEFAULT_DEVICE_TIMEOUT_SECONDS,
+        stale_after: timedelta = timedelta(minutes=DEFAULT_STALE_AFTER_MINUTES),
     ):
         """Initialize."""
         self.api = api
         self.devices = devices
+        self.stale_devices: set[str] = set()
+        self.device_health: dict[str, DeviceHealth] = {}
+        self.flow: dict[str, FlowTracker] = {}
+        # Devices that kept failing for longer than `stale_after`.
+        self.unavailable_devices: set[str] = set()
+        self._stale_after = stale_after
+        # Changed key paths per device in the last update; None means all keys.
+        self.device_changes: dict[str, set[str] | None] = {}
+        self._next_poll: dict[str, float] = {}
+        self._poll_interval: dict[str, float] = {}
+        self._pending_commands: dict[str, float] = {}
+        self._bulk_supported: bool | None = None
+        self._delta_supported: bool | None = None
+        self._sync_cursor: str | None = None
+        # Delay the first scheduled cycle so entries do not poll in lockstep.
+        self._poll_offset = get_request_scheduler().poll_offset()
+        self._listeners_success = True
+        self._semaphore = asyncio.Semaphore(max_parallel_requests)
+        self._device_timeout = device_timeout
+        self._push_task: asyncio.Task[None] | None = None
+        self._discovery_unsub: CALLBACK_TYPE | None = None
+        self._leak_poll_unsub: CALLBACK_TYPE | None = None
+        self._leak_poll_running = False
+        # Consecutive discoveries each known device was missing from.
+        self._missed_discoveries: dict[str, int] = {}
+        self._new_devices_listeners: list[Callable[[list[QuandifyDevice]], None]] = []
+        # Clients of the other accounts of the organization, by config entry id.
+        self._member_apis: dict[str, QuandifyAPI] = {}
+        # The member entries that can see a device the owner account cannot.
+        self._device_members: dict[str, set[str]] = {}
+        # Member entries whose authentication failed, until they are set up again.
+        self._failed_members: set[str] = set()
+        self.commands = QuandifyCommandQueue(
+            hass, self.api_for, self._async_command_finished
+        )
+        self.command_results: dict[str, CommandResult] = {}
+        self.push_connected = False
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=UPDATE_INTERVAL_MINUTES),
+            update_interval=timedelta(seconds=SCHEDULER_TICK_SECONDS),
+        )
+
+    def api_for(self, device_id: str) -> QuandifyAPI:
+        """Return the client of an account that can see a device."""
+        if (entry_id := self._member_entry_id(device_id)) is not None:
+            return self._member_apis[entry_id]
+        return self.api
+
+    def _member_entry_id(self, device_id: str) -> str | None:
+        """Return the member entry whose account polls a device, if not the owner.
+
+        Accounts whose authentication failed are only used if no other can.
+        """
+        members = self._device_members.get(device_id, set()) & self._member_apis.keys()
+        if not members:
+            return None
+        return min(members - self._failed_members, default=min(members))
+
+    @callback
+    def _async_member_auth_failed(self, entry_id: str, err: Exception) -> None:
+        """Ask to reauthenticate a member account whose credentials stopped working.
+
+        Only the devices polled with that account are affected.
+        """
+        if entry_id in self._failed_members:
+            return
+        self._failed_members.add(entry_id)
+        _LOGGER.warning("Authentication failed for config entry %s: %s", entry_id, err)
+        if (entry := self.hass.config_entries.async_get_entry(entry_id)) is not None:
+            entry.async_start_reauth(self.hass)
+
+    async def _async_fetch_device(self, device: QuandifyDevice) -> dict[str, Any]:
+        """Fetch a single device, bounded by the concurrency limit and timeout."""
+        async with self._semaphore:
+            async with asyncio.timeout(self._device_timeout):
+                return await self.api_for(device.id).get_device_info(device.id)
+
+    async def _async_fetch_devices(
+        self, devices: list[QuandifyDevice]
+    ) -> dict[str, Any]:
+        """Fetch devices with the client of an account that can see each of them.
+
+        Failed devices map to the exception raised while fetching them.
+        """
+        groups: dict[QuandifyAPI, list[QuandifyDevice]] = {}
+        for device in devices:
+            groups.setdefault(self.api_for(device.id), []).append(device)
+        results: dict[str, Any] = {}
+        for group_results in await asyncio.gather(
+            *(self._async_fetch_group(api, group) for api, group in groups.items())
+        ):
+            results.update(group_results)
+        return results
+
+    async def _async_fetch_group(
+        self, api: QuandifyAPI, devices: list[QuandifyDevice]
+    ) -> dict[str, Any]:
+        """Fetch devices, preferring the bulk endpoint over one request per device.
+
+        Failed devices map to the exception raised while fetching them.
+        """
+        results: dict[str, Any] = {}
+
+        if len(devices) > 1 and self._bulk_supported is not False:
+            pages = math.ceil(len(devices) / BULK_PAGE_SIZE)
+            try:
+                async with asyncio.timeout(self._device_timeout * pages):
+                    results = await api.get_devices_status(
+                        [device.id for device in devices]
+                    )
+            except QuandifyBulkUnsupported as err:
+                _LOGGER.info("Falling back to per-device polling: %s", err)
+                self._bulk_supported = False
+            except ConfigEntryAuthFailed as err:
+                # Polling these devices one by one would fail the same way.
+                return {device.id: err for device in devices}
+            except (aiohttp.ClientError, TimeoutError, QuandifyAPIError) as err:
+                _LOGGER.debug("Bulk device fetch failed, polling per device: %r", err)
+            else:
+                self._bulk_supported = True
+
+        missing = [device for device in devices if device.id not in results]
+        fetched = await asyncio.gather(
+            *(self._async_fetch_device(device) for device in missing),
+            return_exceptions=True,
+        )
+        results.update(
+            (device.id, result) for device, result in zip(missing, fetched)
+        )
+        return results
+
+    async def _async_update_data(self) -> dict[str, QuandifyDeviceData]:
+        """Poll the devices that are due, recording how long the refresh took."""
+        if self._poll_offset and self._next_poll:
+            delay, self._poll_offset = self._poll_offset, 0
+            await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        due = [
+            device
+            for device in self.devices
+            if self._next_poll.get(device.id, 0) <= now
+        ]
+        started = time.perf_counter()
+        try:
+            return await self._async_poll_due_devices(due, now)
+        finally:
+            # Ticks with nothing due take no time and would hide real refreshes.
+            if due:
+                self.api.metrics.record_refresh(
+                    (time.perf_counter() - started) * 1000
+                )
+
+    async def _async_poll_due_devices(
+        self, due: list[QuandifyDevice], now: float
+    ) -> dict[str, QuandifyDeviceData]:
+        """Refresh the devices whose next poll time has passed.
+
+        Uses incremental sync when the cloud offers it, otherwise polls the due
+        devices concurrently.
+        """
+        changes: dict[str, set[str] | None] = {}
+        # Devices the delta confirmed as unchanged.
+        synced: set[str] = set()
+
+        if due and (delta := await self._async_fetch_delta()) is not None:
+            previous = self.data or {}
+            # The delta covers every device the owner account can see.
+            # Unchanged devices are neither transferred nor parsed; only changed
+            # and never-fetched ones are. Devices of other accounts are polled.
+            due_ids = {device.id for device in due}
+            for device in self.devices:
+                if (
+                    device.id not in delta
+                    and device.id in previous
+                    and device.id not in self._device_members
+                ):
+                    synced.add(device.id)
+                    self._record_success(device.id)
+                    if self._add_volume_sample(device.id, previous[device.id]):
+                        changes[device.id] = {FLOW_KEY}
+                    self._schedule_device(
+                        device.id,
+                        now,
+                        active=self._is_active(device.id, previous[device.id], set()),
+                    )
+            # Devices the delta does not cover, such as ones that never
+            # returned good data, keep their backoff and circuit breaker.
+            due = [
+                device
+                for device in self.devices
+                if device.id in delta
+                or (
+                    (device.id not in previous or device.id in self._device_members)
+                    and device.id in due_ids
+                    and not self._circuit_open(device.id)
+                )
+            ]
+            results: dict[str, Any] = {
+                device_id: _merge(asdict(previous[device_id]), raw)
+                if device_id in previous
+                else raw
+                for device_id, raw in delta.items()
+            }
+            results.update(
+                await self._async_fetch_devices(
+                    [device for device in due if device.id not in results]
+                )
+            )
+        else:
+            results = await self._async_fetch_devices(due)
+
+        # The leak channel, push updates and command confirmations may have
+        # replaced device data while fetching. Build on the current data, so
+        # their newer values are neither lost nor reported as changes again.
+        previous = self.data or {}
+        stale = self.stale_devices - synced
+        data: dict[str, QuandifyDeviceData] = dict(previous)
+        errors: list[BaseException] = []
+        # Discovery may also have removed devices meanwhile.
+        known = {device.id for device in self.devices}
+
+        for device in due:
+            if device.id not in known:
+                continue
+            result = results[device.id]
+            if isinstance(result, ConfigEntryAuthFailed):
+                if (entry_id := self._member_entry_id(device.id)) is None:
+                    raise result
+                self._async_member_auth_failed(entry_id, result)
+            if not isinstance(result, BaseException):
+                try:
+                    result = QuandifyDeviceData.from_api(result)
+                except QuandifyParseError as err:
+                    _LOGGER.error("Unexpected data for device %s: %s", device.id, err)
+                    result = err
+            if isinstance(result, BaseException):
+                # Keep the last good data for this device and mark it stale.
+                stale.add(device.id)
+                errors.append(result)
+                self._schedule_device(device.id, now, active=False)
+                self._record_failure(device.id, result, now)
+                continue
+            changed = _changed_paths(previous.get(device.id), result)
+            if self._add_volume_sample(device.id, result) and changed is not None:
+                changed.add(FLOW_KEY)
+            if changed is None or changed:
+                changes[device.id] = changed
+                self._async_check_leak(device.id, previous.get(device.id), result)
+            self._schedule_device(
+                device.id, now, active=self._is_active(device.id, result, changed)
+            )
+            data[device.id] = result
+            stale.discard(device.id)
+            self._record_success(device.id)
+
+        if self.data is None and due and len(errors) == len(due):
+            # Nothing to fall back on yet, such as during the first refresh.
+            raise UpdateFailed(f"Error communicating with API: {errors[0]!r}")
+
+        self._update_availability(changes)
+        self.stale_devices = stale
+        self.device_changes = changes
+        return data
+
+    async def _async_fetch_delta(self) -> dict[str, dict[str, Any]] | None:
+        """Fetch the devices changed since the last sync, advancing the cursor.
+
+        Falls back to a full resync if the cursor is rejected. Returns None if
+        incremental sync is unavailable or failed, so devices are polled instead.
+        """
+        if self._delta_supported is False:
+            return None
+        pages = max(math.ceil(len(self.devices) / BULK_PAGE_SIZE), 1)
+        try:
+            async with asyncio.timeout(self._device_timeout * pages):
+                try:
+                    delta, cursor = await self.api.get_device_changes(
+                        self._sync_cursor
+                    )
+                except QuandifyCursorExpired as err:
+                    _LOGGER.info("Resynchronizing all devices: %s", err)
+                    delta, cursor = await self.api.get_device_changes(None)
+        except QuandifyDeltaUnsupported as err:
+            _LOGGER.info("Falling back to polling devices: %s", err)
+            self._delta_supported = False
+            return None
+        except (aiohttp.ClientError, TimeoutError, QuandifyAPIError) as err:
+            _LOGGER.debug("Incremental sync failed, polling devices: %r", err)
+            return None
+
+        self._delta_supported = True
+        self._sync_cursor = cursor
+        return delta
+
+    def _record_success(self, device_id: str) -> None:
+        """Record good data from a device, closing its circuit breaker."""
+        health = self.device_health.setdefault(device_id, DeviceHealth())
+        if health.failing_since is not None:
+            _LOGGER.info("Device %s is responding again", device_id)
+        health.last_success = dt_util.utcnow()
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.failing_since = None
+        health.circuit_open_until = None
+
+    def _record_failure(self, device_id: str, err: BaseException, now: float) -> None:
+        """Record a failed poll, opening the circuit breaker if it keeps failing.
+
+        An open circuit holds back polls of the device for a cooldown that
+        doubles with every further failure, so a chronically failing device
+        does not use up the request budget every cycle.
+        """
+        health = self.device_health.setdefault(device_id, DeviceHealth())
+        utcnow = dt_util.utcnow()
+        if health.failing_since is None:
+            _LOGGER.warning("Error fetching data for device %s: %r", device_id, err)
+            health.failing_since = utcnow
+        else:
+            _LOGGER.debug("Error fetching data for device %s: %r", device_id, err)
+        health.last_failure = utcnow
+        health.last_error = repr(err)
+        health.failures += 1
+        health.consecutive_failures += 1
+
+        if health.consecutive_failures < CIRCUIT_BREAKER_FAILURES:
+            return
+        cooldown = timedelta(
+            minutes=min(
+                CIRCUIT_BREAKER_COOLDOWN_MINUTES
+                * 2 ** (health.consecutive_failures - CIRCUIT_BREAKER_FAILURES),
+                CIRCUIT_BREAKER_COOLDOWN_MAX_MINUTES,
+            )
+        )
+        _LOGGER.info(
+            "Pausing polls of device %s for %s after %d failures",
+            device_id,
+            cooldown,
+            health.consecutive_failures,
+        )
+        health.circuit_open_until = utcnow + cooldown
+        self._next_poll[device_id] = now + cooldown.total_seconds()
+
+    def _add_volume_sample(
+        self, device_id: str, device_data: QuandifyDeviceData
+    ) -> bool:
+        """Feed the current total volume of a device to its flow tracker.
+
+        Returns whether the derived flow values changed.
+        """
+        if (tracker := self.flow.get(device_id)) is None:
+            tracker = self.flow[device_id] = FlowTracker()
+        return tracker.add(time.time(), device_data.status.total_volume)
+
+    def _circuit_open(self, device_id: str) -> bool:
+        """Return whether polls of a device are currently held back."""
+        health = self.device_health.get(device_id)
+        return (
+            health is not None
+            and health.circuit_open_until is not None
+            and health.circuit_open_until > dt_util.utcnow()
+        )
+
+    def _update_availability(self, changes: dict[str, set[str] | None]) -> None:
+        """Mark devices unavailable once they have been failing for too long.
+
+        Devices whose availability flipped are added to `changes` in full, so
+        all of their entities write their state.
+        """
+        now = dt_util.utcnow()
+        unavailable = {
+            device_id
+            for device_id, health in self.device_health.items()
+            if health.failing_since is not None
+            and now - health.failing_since > self._stale_after
+        }
+        for device_id in unavailable ^ self.unavailable_devices:
+            changes[device_id] = None
+        self.unavailable_devices = unavailable
+
+    def device_available(self, device_id: str) -> bool:
+        """Return whether a device has returned good data recently enough."""
+        return device_id not in self.unavailable_devices
+
+    def _is_active(
+        self,
+        device_id: str,
+        current: QuandifyDeviceData,
+        changed: set[str] | None,
+    ) -> bool:
+        """Return whether a device should be polled at the fast cadence."""
+        if self._pending_commands.get(device_id, 0) > time.monotonic():
+            return True
+        if _has_leak(current):
+            return True
+        return changed is not None and "status.total_volume" in changed
+
+    def _schedule_device(self, device_id: str, now: float, active: bool) -> None:
+        """Set when a device is polled next, backing off while it stays idle."""
+        if active:
+            interval = FAST_POLL_INTERVAL_SECONDS
+        else:
+            interval = min(
+                max(
+                    self._poll_interval.get(device_id, 0) * 2,
+                    UPDATE_INTERVAL_MINUTES * 60,
+                ),
+                IDLE_POLL_INTERVAL_MAX_MINUTES * 60,
+            )
+        self._poll_interval[device_id] = interval
+        self._next_poll[device_id] = now + interval
+
+    def device_staleness(self, device_id: str) -> float | None:
+        """Return the seconds since a device last returned good data."""
+        health = self.device_health.get(device_id)
+        if health is None or health.last_success is None:
+            return None
+        return (dt_util.utcnow() - health.last_success).total_seconds()
+
+    @callback
+    def async_set_cached_data(
+        self,
+        data: dict[str, QuandifyDeviceData],
+        flow: dict[str, FlowTracker],
+    ) -> None:
+        """Seed the coordinator with a stored snapshot, marking every device stale."""
+        self.data = data
+        self.flow = flow
+        self.stale_devices = set(data)
+
+    async def async_request_device_refresh(
+        self, device_id: str, command_pending: bool = False
+    ) -> None:
+        """Poll a single device on the next refresh, e.g. after sending it a command."""
+        now = time.monotonic()
+        if command_pending:
+            self._pending_commands[device_id] = now + COMMAND_PENDING_SECONDS
+        self._next_poll[device_id] = now
+        await self.async_request_refresh()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the entities whose device or key changed.
+
+        Listener contexts are either a device id, notified on any change to that
+        device, or a (device id, key path) tuple, notified when that key changed.
+        """
+        if self.last_update_success != self._listeners_success:
+            # Availability changed, every entity needs to write its state.
+            self._listeners_success = self.last_update_success
+            super().async_update_listeners()
+            return
+
+        changes = self.device_changes
+        for update_callback, context in list(self._listeners.values()):
+            if context is None:
+                update_callback()
+            elif isinstance(context, tuple):
+                device_id, key = context
+                if device_id in changes and (
+                    (changed := changes[device_id]) is None or key in changed
+                ):
+                    update_callback()
+            elif context in changes:
+                update_callback()
+
+    @callback
+    def async_start_push(self) -> None:
+        """Start the long-lived push subscription task."""
+        if self._push_task is None:
+            self._push_task = self.hass.async_create_background_task(
+                self._async_push_loop(), f"{DOMAIN} push updates"
+            )
+
+    async def async_shutdown(self) -> None:
+        """Cancel the push subscription, rediscovery and any scheduled refresh."""
+        if self._push_task is not None:
+            self._push_task.cancel()
+            self._push_task = None
+        if self._discovery_unsub is not None:
+            self._discovery_unsub()
+            self._discovery_unsub = None
+        self._async_stop_leak_polling()
+        self.commands.async_cancel()
+        await super().async_shutdown()
+
+    async def async_send_command(
+        self, device_id: str, command: QuandifyCommand
+    ) -> CommandResult:
+        """Send a command through the device's command queue."""
+        return await self.commands.async_send(device_id, command)
+
+    @callback
+    def _async_command_finished(self, device_id: str, result: CommandResult) -> None:
+        """Record a command result and announce it on the event bus."""
+        self.command_results[device_id] = result
+        self.hass.bus.async_fire(
+            EVENT_COMMAND_RESULT,
+            {
+                "device_id": device_id,
+                "command": result.command.value,
+                "success": result.success,
+                "attempts": result.attempts,
+                "error": result.error,
+            },
+        )
+
+    @callback
+    def async_start_discovery(self) -> None:
+        """Periodically rediscover the organization's devices."""
+        if self._discovery_unsub is None:
+            self._discovery_unsub = async_track_time_interval(
+                self.hass,
+                self.async_discover_devices,
+                timedelta(hours=DISCOVERY_INTERVAL_HOURS),
+                name=f"{DOMAIN} device discovery",
+            )
+
+    @callback
+    def async_add_new_devices_listener(
+        self, new_devices_callback: Callable[[list[QuandifyDevice]], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for devices found by rediscovery. Returns a function to stop."""
+        self._new_devices_listeners.append(new_devices_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._new_devices_listeners.remove(new_devices_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_member(self, entry_id: str, api: QuandifyAPI) -> None:
+        """Also provide the devices another account of the organization can see.
+
+        They are added by the next discovery and polled with that account.
+        """
+        self._member_apis[entry_id] = api
+        self._failed_members.discard(entry_id)
+
+    @callback
+    def async_remove_member(self, entry_id: str) -> None:
+        """Stop using an account whose entry unloads, such as for a reload.
+
+        Its devices are kept. They are removed when the entry is removed, or
+        by discovery once they keep missing from every account's list.
+        """
+        self._member_apis.pop(entry_id, None)
+        self._failed_members.discard(entry_id)
+
+    @callback
+    def async_purge_member(self, entry_id: str) -> None:
+        """Remove the devices only the account of a removed entry could see."""
+        self.async_remove_member(entry_id)
+        orphaned: set[str] = set()
+        for device_id, entry_ids in self._device_members.items():
+            entry_ids.discard(entry_id)
+            if not entry_ids:
+                orphaned.add(device_id)
+        if not orphaned:
+            return
+        _LOGGER.info(
+            "Removing Quandify devices of a removed account: %s", sorted(orphaned)
+        )
+        self.devices = [
+            device for device in self.devices if device.id not in orphaned
+        ]
+        self._async_remove_devices(orphaned)
+
+    async def async_discover_devices(self, *_: Any) -> None:
+        """Add entities for new devices and remove departed ones.
+
+        The device lists of all accounts of the organization are merged.
+        Unchanged devices and their entities are left untouched. A device is
+        only removed after it was missing from several discoveries in a row, so
+        one incomplete device list does not remove devices and their settings.
+        """
+        try:
+            raw_devices = await self.api.get_devices()
+        except (aiohttp.ClientError, TimeoutError, ValueError, QuandifyAPIError) as err:
+            _LOGGER.debug("Device discovery failed: %r", err)
+            return
+
+        discovered = {
+            device.id: device
+            for raw in raw_devices
+            if (device := QuandifyDevice.from_api(raw)) is not None
+        }
+        known_devices = {device.id: device for device in self.devices}
+        device_members: dict[str, set[str]] = {}
+        for entry_id, api in list(self._member_apis.items()):
+            try:
+                member_devices = [
+                    device
+                    for raw in await api.get_devices()
+                    if (device := QuandifyDevice.from_api(raw)) is not None
+                ]
+            except (
+                aiohttp.ClientError,
+                TimeoutError,
+                ValueError,
+                QuandifyAPIError,
+                ConfigEntryAuthFailed,
+            ) as err:
+                if isinstance(err, ConfigEntryAuthFailed):
+                    self._async_member_auth_failed(entry_id, err)
+                _LOGGER.debug("Device discovery failed for %s: %r", entry_id, err)
+                # Assume the account still sees the devices it did before.
+                member_devices = [
+                    known_devices[device_id]
+                    for device_id, entry_ids in self._device_members.items()
+                    if entry_id in entry_ids and device_id in known_devices
+                ]
+            for device in member_devices:
+                if device.id in discovered and device.id not in device_members:
+                    # The owner account sees this device.
+                    continue
+                discovered.setdefault(device.id, device)
+                device_members.setdefault(device.id, set()).add(entry_id)
+        self._device_members = device_members
+        self._async_update_interval()
+
+        if not discovered and self.devices:
+            _LOGGER.debug("Ignoring an empty device list during discovery")
+            return
+
+        known = {device.id for device in self.devices}
+        new_devices = [
+            device for device_id, device in discovered.items() if device_id not in known
+        ]
+        missing = known - discovered.keys()
+        self._missed_discoveries = {
+            device_id: self._missed_discoveries.get(device_id, 0) + 1
+            for device_id in missing
+        }
+        removed = {
+            device_id
+            for device_id, misses in self._missed_discoveries.items()
+            if misses >= DISCOVERY_REMOVE_AFTER_MISSES
+        }
+        if missing - removed:
+            _LOGGER.debug(
+                "Devices missing from discovery: %s", sorted(missing - removed)
+            )
+        if not new_devices and not removed:
+            return
+
+        self.devices = [
+            device for device in self.devices if device.id not in removed
+        ] + new_devices
+
+        if removed:
+            _LOGGER.info("Removing departed Quandify devices: %s", sorted(removed))
+            self._async_remove_devices(removed)
+        if new_devices:
+            _LOGGER.info(
+                "Adding new Quandify devices: %s", [device.id for device in new_devices]
+            )
+            for new_devices_callback in list(self._new_devices_listeners):
+                new_devices_callback(new_devices)
+            # New devices have no poll schedule yet, so they are due right away.
+            await self.async_request_refresh()
+
+    @callback
+    def _async_remove_devices(self, device_ids: set[str]) -> None:
+        """Forget departed devices and remove them from the device registry."""
+        if self.data is not None:
+            self.data = {
+                device_id: device_data
+                for device_id, device_data in self.data.items()
+                if device_id not in device_ids
+            }
+        self.stale_devices -= device_ids
+        self.unavailable_devices -= device_ids
+        for device_id in device_ids:
+            self._next_poll.pop(device_id, None)
+            self._poll_interval.pop(device_id, None)
+            self._pending_commands.pop(device_id, None)
+            self.device_health.pop(device_id, None)
+            self.flow.pop(device_id, None)
+            self._missed_discoveries.pop(device_id, None)
+            self._device_members.pop(device_id, None)
+        self._async_update_interval()
+        for api in (self.api, *self._member_apis.values()):
+            api.forget_devices(device_ids)
+        # Let listeners, such as the snapshot store, see the new device list.
+        self.device_changes = {}
+        self.async_update_listeners()
+
+        if self.config_entry is None:
+            return
+        device_registry = dr.async_get(self.hass)
+        for device_id in device_ids:
+            if device := device_registry.async_get_device(
+                identifiers={(DOMAIN, device_id)}
+            ):
+                # Removing the device also removes its entities.
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=self.config_entry.entry_id
+                )
+
+    async def _async_push_loop(self) -> None:
+        """Apply streamed device updates, reconnecting with backoff on drops."""
+        backoff = PUSH_RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                async for update in self.api.stream_device_updates():
+                    if not self.push_connected:
+                        self._async_set_push_connected(True)
+                        backoff = PUSH_RECONNECT_MIN_SECONDS
+                    self._async_apply_push_update(update)
+            except ConfigEntryAuthFailed as err:
+                _LOGGER.error("Push updates stopped, authentication failed: %s", err)
+                self._async_set_push_connected(False)
+                return
+            except (aiohttp.ClientError, TimeoutError, ValueError) as err:
+                _LOGGER.debug("Push update stream dropped: %r", err)
+            else:
+                _LOGGER.debug("Push update stream closed by server")
+
+            self._async_set_push_connected(False)
+            await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+            backoff = min(backoff * 2, PUSH_RECONNECT_MAX_SECONDS)
+
+    @callback
+    def _async_set_push_connected(self, connected: bool) -> None:
+        """Relax polling while the stream is up and fall back to it when it drops."""
+        if connected == self.push_connected:
+            return
+        self.push_connected = connected
+        self._async_update_interval()
+        if connected:
+            _LOGGER.debug("Push update stream connected")
+        else:
+            # Catch up on anything missed while the stream was down.
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_update_interval(self) -> None:
+        """Relax the scheduler only while the push stream covers every device.
+
+        The stream belongs to the owner account, so devices polled with
+        another account keep the regular scheduler tick.
+        """
+        if self.push_connected and not self._device_members:
+            self.update_interval = timedelta(minutes=PUSH_POLL_INTERVAL_MINUTES)
+        else:
+            self.update_interval = timedelta(seconds=SCHEDULER_TICK_SECONDS)
+
+    @callback
+    def _async_apply_push_update(self, update: dict[str, Any]) -> None:
+        """Merge an incremental device update into the current data."""
+        device_id = update["id"]
+        if self.data is None or device_id not in {d.id for d in self.devices}:
+            return
+
+        previous = self.data.get(device_id)
+        try:
+            device_data = QuandifyDeviceData.from_api(
+                _merge(asdict(previous) if previous else {}, update)
+            )
+        except QuandifyParseError as err:
+            _LOGGER.error("Unexpected push update for device %s: %s", device_id, err)
+            return
+        self.async_set_device_data(device_id, device_data)
+
+    @callback
+    def async_set_device_data(
+        self, device_id: str, device_data: QuandifyDeviceData
+    ) -> None:
+        """Replace the data of one device, notifying only its changed entities."""
+        previous = self.data.get(device_id) if self.data is not None else None
+        self.stale_devices.discard(device_id)
+        self._record_success(device_id)
+        changed = _changed_paths(previous, device_data)
+        # Other updates, such as the leak channel, carry no fresh volume.
+        fresh_volume = changed is None or "status.total_volume" in changed
+        if fresh_volume and self._add_volume_sample(device_id, device_data):
+            if changed is not None:
+                changed.add(FLOW_KEY)
+        if device_id in self.unavailable_devices:
+            # The device is back, so all of its entities need to write their state.
+            self.unavailable_devices.discard(device_id)
+            changed = None
+        if changed is not None and not changed:
+            return
+        self.device_changes = {device_id: changed}
+        # Unlike async_set_updated_data, this does not restart the refresh
+        # timer, so frequent push updates cannot postpone the safety net poll.
+        self.data = {**(self.data or {}), device_id: device_data}
+        self.async_update_listeners()
+        self._async_check_leak(device_id, previous, device_data)
+
+    @callback
+    def _async_check_leak(
+        self,
+        device_id: str,
+        previous: QuandifyDeviceData | None,
+        current: QuandifyDeviceData,
+    ) -> None:
+        """Fire an event when a known device starts reporting a leak."""
+        if previous is None or _has_leak(previous) or not _has_leak(current):
+            return
+        name = next(
+            (device.name for device in self.devices if device.id == device_id), None
+        )
+        _LOGGER.warning("Leak detected by device %s (%s)", name, device_id)
+        self.hass.bus.async_fire(
+            EVENT_LEAK_DETECTED,
+            {
+                "device_id": device_id,
+                "name": name,
+                "leak_state": current.leak_status.leak_state,
+            },
         )
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data via library by polling."""
+    @callback
+    def async_start_leak_polling(self) -> None:
+        """Poll only the leak status of all devices, far more often than full polls."""
+        if self._leak_poll_unsub is None:
+            self._leak_poll_unsub = async_track_time_interval(
+                self.hass,
+                self._async_poll_leaks,
+                timedelta(seconds=LEAK_POLL_INTERVAL_SECONDS),
+                name=f"{DOMAIN} leak poll",
+            )
+
+    @callback
+    def _async_stop_leak_polling(self) -> None:
+        """Stop the leak-only poll."""
+        if self._leak_poll_unsub is not None:
+            self._leak_poll_unsub()
+            self._leak_poll_unsub = None
+
+    async def _async_poll_leaks(self, *_: Any) -> None:
+        """Fetch the leak status of every device and apply any change right away.
+
+        While the push stream is connected, only devices of other accounts are
+        checked, as the stream already delivers the leaks of the owner's. A
+        changed device also gets a full poll on the next scheduler tick.
+        """
+        if self._leak_poll_running or self.data is None:
+            return
+        groups: dict[QuandifyAPI, list[str]] = {}
+        for device in self.devices:
+            if self._circuit_open(device.id) or (
+                self.push_connected and device.id not in self._device_members
+            ):
+                continue
+            groups.setdefault(self.api_for(device.id), []).append(device.id)
+        if not groups:
+            return
+
+        self._leak_poll_running = True
+        pages = sum(
+            math.ceil(len(device_ids) / BULK_PAGE_SIZE)
+            for device_ids in groups.values()
+        )
+        leak_states: dict[str, dict[str, Any]] = {}
         try:
-            async with asyncio.timeout(30):
-                data = {}
-                for device in self.devices:
-                    device_info = await self.api.get_device_info(device.id)
-                    data[device.id] = device_info
-                return data
-        except Exception as exception:
-            raise UpdateFailed(
-                f"Error communicating with API: {exception}"
-            ) from exception
+            async with asyncio.timeout(self._device_timeout * pages):
+                for api, device_ids in groups.items():
+                    leak_states.update(await api.get_leak_states(device_ids))
+        except QuandifyBulkUnsupported as err:
+            _LOGGER.info("Leak polling is not available, using regular polls: %s", err)
+            self._async_stop_leak_polling()
+            return
+        except (
+            aiohttp.ClientError,
+            TimeoutError,
+            QuandifyAPIError,
+            ConfigEntryAuthFailed,
+        ) as err:
+            # Failures, including authentication, surface through the full poll.
+            _LOGGER.debug("Leak poll failed: %r", err)
+            return
+        finally:
+            self._leak_poll_running = False
+
+        for device_id, raw in leak_states.items():
+            current = self.data.get(device_id)
+            section = raw.get("leak_status")
+            if current is None or not isinstance(section, dict):
+                continue
+            try:
+                leak_status = QuandifyLeakStatus.from_api(section)
+            except QuandifyParseError as err:
+                _LOGGER.debug("Unexpected leak status for %s: %s", device_id, err)
+                continue
+            if leak_status == current.leak_status:
+                continue
+            self.async_set_device_data(
+                device_id, replace(current, leak_status=leak_status)
+            )
+            self._next_poll[device_id] = time.monotonic()
+
+    async def async_confirm_device_state(
+        self,
+        device_id: str,
+        predicate: Callable[[QuandifyDeviceData], bool],
+        timeout: float = COMMAND_CONFIRM_TIMEOUT_SECONDS,
+    ) -> bool:
+        """Poll one device at a short interval until `predicate` holds.
+
+        Used after a command instead of refreshing the whole fleet. Returns
+        whether the state was confirmed before the deadline.
+        """
+        deadline = time.monotonic() + timeout
+        self._pending_commands[device_id] = deadline + COMMAND_PENDING_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(COMMAND_CONFIRM_INTERVAL_SECONDS)
+            try:
+                async with asyncio.timeout(self._device_timeout):
+                    raw = await self.api_for(device_id).get_device_info(device_id)
+                device_data = QuandifyDeviceData.from_api(raw)
+            except (
+                aiohttp.ClientError,
+                TimeoutError,
+                QuandifyAPIError,
+                QuandifyParseError,
+                ConfigEntryAuthFailed,
+            ) as err:
+                # Authentication failures surface through the regular poll.
+                _LOGGER.debug("Confirmation poll of %s failed: %r", device_id, err)
+                continue
+            self.async_set_device_data(device_id, device_data)
+            if predicate(device_data):
+                return True
+        return False
+
+
+@dataclass
+class QuandifyOrganization:
+    """A coordinator shared by every config entry of one organization.
+
+    The owner entry created the coordinator and provides the entities. Other
+    entries add their account, so devices only it can see are polled with it.
+    """
+
+    coordinator: QuandifyDataUpdateCoordinator
+    owner_entry_id: str
+    entry_ids: set[str] = field(default_factory=set)
+    # Platforms forwarded for the owner entry.
+    platforms: set[str] = field(default_factory=set)
+
+
+def _has_leak(device_data: QuandifyDeviceData) -> bool:
+    """Return whether a device reports a leak."""
+    return device_data.leak_status.leak_state not in (None, "noLeak")
+
+
+def _merge(current: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
+    """Return `current` with the (possibly partial) `update` merged in recursively."""
+    merged = dict(current)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _changed_paths(
+    previous: Any | None, current: Any, prefix: str = ""
+) -> set[str] | None:
+    """Return the dotted field paths that differ between two device snapshots.
+
+    Parents of a changed field are included, so "status" is reported along with
+    "status.total_volume". Returns None if there is no previous snapshot.
+    """
+    if previous is None:
+        return None
+    if previous == current:
+        return set()
+
+    changed: set[str] = set()
+    for name in current.__slots__:
+        old, new = getattr(previous, name), getattr(current, name)
+        if old == new:
+            continue
+        path = f"{prefix}{name}"
+        changed.add(path)
+        if is_dataclass(old) and is_dataclass(new):
+            changed |= _changed_paths(old, new, f"{path}.")
+        elif is_dataclass(old) or is_dataclass(new):
+            # An optional section appeared or disappeared.
+            changed |= _all_paths(old if new is None else new, f"{path}.")
+    return changed
+
+
+def _all_paths(value: Any, prefix: str) -> set[str]:
+    """Return the dotted paths of every field in a (nested) dataclass."""
+    paths: set[str] = set()
+    for name in value.__slots__:
+        paths.add(f"{prefix}{name}")
+        if is_dataclass(section := getattr(value, name)):
+            paths |= _all_paths(section, f"{prefix}{name}.")
+    return paths
@@ -1,6 +1,7 @@
 """Diagnostics support for Quandify integration."""
 
 from __future__ import annotations
+from dataclasses import asdict
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
@@ -31,6 +32,24 @@ async def async_get_config_entry_diagnostics(
         },
         "coordinator": {
             "last_update_success": coordinator.last_update_success,
-            "data": coordinator.data,
+            "stale_devices": sorted(coordinator.stale_devices),
+            "unavailable_devices": sorted(coordinator.unavailable_devices),
+            "device_staleness_seconds": {
+                device.id: coordinator.device_staleness(device.id)
+                for device in coordinator.devices
+            },
+            "device_health": {
+                device_id: asdict(health)
+                for device_id, health in coordinator.device_health.items()
+            },
+            "data": {
+                device_id: asdict(device_data)
+                for device_id, device_data in (coordinator.data or {}).items()
+            },
+        },
+        "api": {
+            "cache_hits": coordinator.api.cache_hits,
+            "cache_misses": coordinator.api.cache_misses,
+            "metrics": coordinator.api.metrics.as_dict(),
         },
     }
@@ -1,11 +1,57 @@
 """Base entity for the Quandify integration."""
+from collections.abc import Callable
+from operator import attrgetter
 from typing import Any
 
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
-from .models import QuandifyDevice
+from .models import QuandifyDevice, QuandifyDeviceData
+
+ValueFn = Callable[[QuandifyDeviceData | None], Any]
+
+_VALUE_FNS: dict[tuple[str, Callable[[Any], Any] | None], ValueFn] = {}
+
+
+def compile_value_fn(
+    key: str, transform: Callable[[Any], Any] | None = None
+) -> ValueFn:
+    """Compile a dotted key path and optional transform into an accessor.
+
+    Accessors are cached, so every entity sharing a description reuses the same
+    callable. The accessor returns None if the device data is missing, otherwise
+    the transformed value at the key path (None if an optional part is missing).
+    """
+    if (value_fn := _VALUE_FNS.get((key, transform))) is not None:
+        return value_fn
+
+    get_path = attrgetter(key)
+
+    def get_value(data: QuandifyDeviceData) -> Any:
+        try:
+            return get_path(data)
+        except AttributeError:
+            # An optional section, such as the valve, is missing.
+            return None
+
+    if transform is None:
+
+        def value_fn(data: QuandifyDeviceData | None) -> Any:
+            if data is None:
+                return None
+            return get_value(data)
+
+    else:
+
+        def value_fn(data: QuandifyDeviceData | None) -> Any:
+            if data is None:
+                return None
+            return transform(get_value(data))
+
+    _VALUE_FNS[(key, transform)] = value_fn
+    return value_fn
 
 
 class QuandifyEntity(CoordinatorEntity[QuandifyDataUpdateCoordinator]):
@@ -13,9 +59,18 @@ class QuandifyEntity(CoordinatorEntity[QuandifyDataUpdateCoordinator]):
 
     _attr_has_entity_name = True
 
-    def __init__(self, coordinator: QuandifyDataUpdateCoordinator, device: QuandifyDevice):
-        """Initialize the entity."""
-        super().__init__(coordinator)
+    def __init__(
+        self,
+        coordinator: QuandifyDataUpdateCoordinator,
+        device: QuandifyDevice,
+        key: str | None = None,
+    ):
+        """Initialize the entity.
+
+        The device id and optional key path form the listener context, so the
+        coordinator only notifies this entity when its data actually changed.
+        """
+        super().__init__(coordinator, (device.id, key) if key else device.id)
         self.device = device
         self._attr_device_info = {
             "identifiers": {(DOMAIN, self.device.id)},
@@ -27,6 +82,44 @@ class QuandifyEntity(CoordinatorEntity[QuandifyDataUpdateCoordinator]):
         }
 
     @property
-    def device_data(self) -> dict[str, Any] | None:
+    def available(self) -> bool:
+        """Return whether the device has returned good data recently enough."""
+        return super().available and self.coordinator.device_available(self.device.id)
+
+    @property
+    def device_data(self) -> QuandifyDeviceData | None:
         """Return the latest data for this entity's device."""
         return self.coordinator.data.get(self.device.id)
+
+
+class QuandifyServiceEntity(CoordinatorEntity[QuandifyDataUpdateCoordinator]):
+    """Base class for entities of the integration itself, such as its metrics."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator: QuandifyDataUpdateCoordinator, entry_id: str):
+        """Initialize the entity on a service device for the config entry."""
+        super().__init__(coordinator)
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry_id)},
+            "name": "Quandify cloud",
+            "manufacturer": "Quandify",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
+
+
+class QuandifyCommandEntity(QuandifyEntity):
+    """Base class for entities that send commands to their device."""
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the result of the last command sent to the device."""
+        if (result := self.coordinator.command_results.get(self.device.id)) is None:
+            return None
+        return {
+            "last_command": result.command.value,
+            "last_command_success": result.success,
+            "last_command_attempts": result.attempts,
+            "last_command_at": result.finished_at.isoformat(),
+            "last_command_error": result.error,
+        }
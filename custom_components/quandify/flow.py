@@ -0,0 +1,149 @@
+"""Flow rate and consumption windows derived from volume samples."""
+
+from collections import deque
+from typing import Any
+
+from .const import (
+    FAST_POLL_INTERVAL_SECONDS,
+    FLOW_HISTORY_RESOLUTION_MINUTES,
+    FLOW_HISTORY_SIZE,
+)
+
+# Listener context key of the derived flow values of a device.
+FLOW_KEY = "flow"
+
+Sample = tuple[float, float]
+
+
+class FlowTracker:
+    """Derives flow values for one device from successive total volume samples.
+
+    Samples are (UNIX timestamp, liters). The two most recent samples give the
+    instantaneous flow. A fixed-size ring buffer with one sample per
+    FLOW_HISTORY_RESOLUTION_MINUTES covers the 24 hour window, so memory stays
+    constant however often the device is polled. Windows end at the latest
+    sample, not at the current time.
+    """
+
+    __slots__ = ("_history", "_previous", "_latest", "_flow_started")
+
+    def __init__(self) -> None:
+        """Initialize an empty tracker."""
+        self._history: deque[Sample] = deque(maxlen=FLOW_HISTORY_SIZE)
+        self._previous: Sample | None = None
+        self._latest: Sample | None = None
+        # Estimated start of the current run of increasing volume.
+        self._flow_started: float | None = None
+
+    def add(self, timestamp: float, volume: float | None) -> bool:
+        """Add a volume sample. Returns whether any derived value changed."""
+        if volume is None or (
+            self._latest is not None and timestamp <= self._latest[0]
+        ):
+            return False
+        before = self.values()
+
+        if self._latest is not None and volume < self._latest[1]:
+            # The counter was reset, such as when a device was replaced.
+            self._history.clear()
+            self._previous = self._latest = self._flow_started = None
+        if self._latest is not None:
+            if volume > self._latest[1]:
+                if self._flow_started is None:
+                    # The flow began somewhere since the previous sample, which
+                    # may be an idle poll long ago. Assume it began at most one
+                    # fast poll before this sample, so a short tap after a long
+                    # gap does not read as a long continuous flow.
+                    self._flow_started = max(
+                        self._latest[0], timestamp - FAST_POLL_INTERVAL_SECONDS
+                    )
+            else:
+                self._flow_started = None
+
+        self._previous, self._latest = self._latest, (timestamp, volume)
+        if (
+            not self._history
+            or timestamp - self._history[-1][0]
+            >= FLOW_HISTORY_RESOLUTION_MINUTES * 60
+        ):
+            self._history.append(self._latest)
+        return self.values() != before
+
+    @property
+    def flow_rate(self) -> float | None:
+        """Return the flow between the two latest samples, in liters per minute."""
+        if self._previous is None or self._latest is None:
+            return None
+        (start, start_volume), (end, end_volume) = self._previous, self._latest
+        return round((end_volume - start_volume) / (end - start) * 60, 3)
+
+    @property
+    def continuous_flow_minutes(self) -> float | None:
+        """Return for how long water has flowed without a pause, in minutes."""
+        if self._latest is None:
+            return None
+        if self._flow_started is None:
+            return 0.0
+        return round((self._latest[0] - self._flow_started) / 60, 1)
+
+    def consumption(self, window_seconds: float) -> float | None:
+        """Return the liters used in the window ending at the latest sample.
+
+        The volume at the start of the window is interpolated between the
+        samples around it. If the history is shorter than the window, the
+        consumption since the oldest sample is returned.
+        """
+        if self._latest is None:
+            return None
+        end, end_volume = self._latest
+        cutoff = end - window_seconds
+
+        start_volume = self._history[0][1]
+        earlier: Sample | None = None
+        for sample in (*self._history, self._latest):
+            if sample[0] <= cutoff:
+                earlier = sample
+                continue
+            if earlier is not None:
+                (t0, v0), (t1, v1) = earlier, sample
+                start_volume = v0 + (v1 - v0) * (cutoff - t0) / (t1 - t0)
+            break
+        return round(end_volume - start_volume, 3)
+
+    def values(self) -> tuple[float | None, ...]:
+        """Return all derived values, to detect when they change."""
+        return (
+            self.flow_rate,
+            self.consumption(3600),
+            self.consumption(86400),
+            self.continuous_flow_minutes,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the tracker state in a JSON friendly form."""
+        return {
+            "history": [list(sample) for sample in self._history],
+            "previous": self._previous and list(self._previous),
+            "latest": self._latest and list(self._latest),
+            "flow_started": self._flow_started,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FlowTracker":
+        """Restore a tracker saved with as_dict.
+
+        Raises KeyError, TypeError or ValueError if the data is malformed.
+        """
+        tracker = cls()
+        tracker._history.extend(
+            (float(timestamp), float(volume)) for timestamp, volume in data["history"]
+        )
+        for name in ("previous", "latest"):
+            if (sample := data[name]) is not None:
+                timestamp, volume = sample
+                setattr(tracker, f"_{name}", (float(timestamp), float(volume)))
+        if (flow_started := data["flow_started"]) is not None:
+            tracker._flow_started = float(flow_started)
+        if tracker._latest is not None and not tracker._history:
+            tracker._history.append(tracker._latest)
+        return tracker
@@ -0,0 +1,126 @@
+"""Request and refresh instrumentation for the Quandify integration."""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Path segments that name a collection; the segment after one is an identifier.
+_COLLECTIONS = {"accounts", "devices", "organization"}
+# Sub-resources of a collection that are not identifiers.
+_ACTIONS = {"status", "stream"}
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """Return a low-cardinality endpoint label, such as "GET /devices/{id}"."""
+    segments = urlsplit(url).path.strip("/").split("/")
+    for index in range(1, len(segments)):
+        if segments[index - 1] in _COLLECTIONS and segments[index] not in _ACTIONS:
+            segments[index] = "{id}"
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+
+@dataclass(slots=True)
+class LatencyHistogram:
+    """A fixed-bucket histogram of durations in milliseconds."""
+
+    buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    )
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def observe(self, duration_ms: float) -> None:
+        """Record one duration."""
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS_MS)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    @property
+    def mean_ms(self) -> float | None:
+        """Return the mean duration, or None if nothing was recorded."""
+        return self.total_ms / self.count if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram in a JSON friendly form."""
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [
+            f">{LATENCY_BUCKETS_MS[-1]}"
+        ]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean_ms, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class QuandifyMetrics:
+    """Counters and timings for API requests and coordinator refreshes.
+
+    Every HTTP attempt is recorded, so a request retried twice counts as three
+    requests and two retries.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.endpoints: dict[str, LatencyHistogram] = {}
+        self.status_codes: Counter[str] = Counter()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.token_refreshes = 0
+        self.bytes_received = 0
+        self.refreshes = LatencyHistogram()
+        self.last_refresh_ms: float | None = None
+
+    def record_request(
+        self, endpoint: str, duration_ms: float, status: int | None
+    ) -> None:
+        """Record one HTTP attempt. `status` is None if no response arrived."""
+        if (histogram := self.endpoints.get(endpoint)) is None:
+            histogram = self.endpoints[endpoint] = LatencyHistogram()
+        histogram.observe(duration_ms)
+        self.requests += 1
+        if status is None:
+            self.errors += 1
+            self.status_codes["error"] += 1
+        else:
+            self.status_codes[str(status)] += 1
+
+    def record_refresh(self, duration_ms: float) -> None:
+        """Record the duration of one coordinator refresh."""
+        self.refreshes.observe(duration_ms)
+        self.last_refresh_ms = duration_ms
+
+    @property
+    def mean_request_ms(self) -> float | None:
+        """Return the mean latency over all endpoints."""
+        total = sum(histogram.total_ms for histogram in self.endpoints.values())
+        return total / self.requests if self.requests else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics in a JSON friendly form."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "token_refreshes": self.token_refreshes,
+            "bytes_received": self.bytes_received,
+            "status_codes": dict(self.status_codes),
+            "endpoints": {
+                endpoint: histogram.as_dict()
+                for endpoint, histogram in sorted(self.endpoints.items())
+            },
+            "refreshes": self.refreshes.as_dict(),
+            "last_refresh_ms": self.last_refresh_ms,
+        }
@@ -1,6 +1,150 @@
 """Models for the Quandify integration."""
 from dataclasses import dataclass
 from typing import Any
+
+from .capabilities import model_for
+
+
+class QuandifyParseError(ValueError):
+    """A device response did not match the expected schema."""
+
+
+def _section(data: dict[str, Any], key: str, required: bool = True) -> dict[str, Any]:
+    """Return a nested object of a response, failing if it has the wrong shape."""
+    value = data.get(key)
+    if value is None and not required:
+        return {}
+    if not isinstance(value, dict):
+        raise QuandifyParseError(f"Expected object for '{key}', got {value!r}")
+    return value
+
+
+def _number(data: dict[str, Any], key: str) -> float | None:
+    """Return an optional numeric field, failing if it is not a number."""
+    value = data.get(key)
+    if value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)):
+        return value
+    raise QuandifyParseError(f"Expected number for '{key}', got {value!r}")
+
+
+def _string(data: dict[str, Any], key: str) -> str | None:
+    """Return an optional string field, failing if it is not a string."""
+    value = data.get(key)
+    if value is None or isinstance(value, str):
+        return value
+    raise QuandifyParseError(f"Expected string for '{key}', got {value!r}")
+
+
+@dataclass(frozen=True, slots=True)
+class QuandifyStatus:
+    """The measured status of a device."""
+
+    total_volume: float | None
+    avg_water_temp: float | None
+    ambient_temp: float | None
+    wifi_signal_strength: float | None
+    rssi: float | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "QuandifyStatus":
+        """Create the status from the `status` object of the API response."""
+        return cls(
+            total_volume=_number(data, "total_volume"),
+            avg_water_temp=_number(data, "avg_water_temp"),
+            ambient_temp=_number(data, "ambient_temp"),
+            wifi_signal_strength=_number(data, "wifi_signal_strength"),
+            rssi=_number(data, "rssi"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class QuandifyLeakStatus:
+    """The leak detection state of a device."""
+
+    leak_state: str | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "QuandifyLeakStatus":
+        """Create the leak status from the `leak_status` object of the API response."""
+        return cls(leak_state=_string(data, "leak_state"))
+
+
+@dataclass(frozen=True, slots=True)
+class QuandifyValveState:
+    """The valve state of a device that has a shut-off valve."""
+
+    state: str | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "QuandifyValveState":
+        """Create the valve state from the `valve` object of the API response."""
+        return cls(state=_string(data, "state"))
+
+
+def _project(data: Any, fields: dict[str, Any]) -> Any:
+    """Keep only `fields` of a decoded object; nested dicts select nested fields."""
+    if not isinstance(data, dict):
+        return data
+    return {
+        key: _project(data[key], nested) if nested else data[key]
+        for key, nested in fields.items()
+        if key in data
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class QuandifyDeviceData:
+    """The parsed, immutable state of a device, holding only the fields we use."""
+
+    sub_type: str | None
+    status: QuandifyStatus
+    leak_status: QuandifyLeakStatus
+    valve: QuandifyValveState | None
+
+    # Response fields read by from_api, used to project large responses.
+    API_FIELDS = {
+        "id": None,
+        "sub_type": None,
+        "status": None,
+        "leak_status": None,
+        "valve": None,
+    }
+
+    # The fields read by the leak-only poll.
+    LEAK_API_FIELDS = {
+        "id": None,
+        "leak_status": {"leak_state": None},
+    }
+
+    @classmethod
+    def project(cls, data: Any) -> Any:
+        """Return a device response reduced to the fields from_api reads."""
+        return _project(data, cls.API_FIELDS)
+
+    @classmethod
+    def project_leak(cls, data: Any) -> Any:
+        """Return a device response reduced to its leak status."""
+        return _project(data, cls.LEAK_API_FIELDS)
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "QuandifyDeviceData":
+        """Parse a device info response.
+
+        Raises QuandifyParseError if the response does not match the schema.
+        """
+        if not isinstance(data, dict):
+            raise QuandifyParseError(f"Expected device object, got {type(data).__name__}")
+        valve = _section(data, "valve", required=False)
+        return cls(
+            sub_type=_string(data, "sub_type"),
+            status=QuandifyStatus.from_api(_section(data, "status")),
+            leak_status=QuandifyLeakStatus.from_api(
+                _section(data, "leak_status", required=False)
+            ),
+            valve=QuandifyValveState.from_api(valve) if valve else None,
+        )
+
+
 @dataclass
 class QuandifyDevice:
     """A class representing a Quandify device."""
@@ -11,26 +155,39 @@ class QuandifyDevice:
     serial: str | None
     firmware_version: str | None
     hardware_version: int | None
-    
+
+    # Response fields read by from_api, used to project the device list.
+    API_FIELDS = {
+        "id": None,
+        "type": None,
+        "hardware_version": None,
+        "serial": None,
+        "firmware_version": None,
+        "node": {"name": None},
+    }
+
     @classmethod
-    def from_api(cls, data: dict[str, Any]) -> "QuandifyDevice":
-        """Create a device object from the API response."""
-        device_type = data.get("type")
+    def project(cls, data: Any) -> Any:
+        """Return a device list entry reduced to the fields from_api reads."""
+        return _project(data, cls.API_FIELDS)
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "QuandifyDevice | None":
+        """Create a device object from the API response.
+
+        Returns None for device types without a model in the capability registry.
+        """
         hardware_version = data.get("hardware_version")
-        
-        model = "Unknown"
+        if (model := model_for(data.get("type"), hardware_version)) is None:
+            return None
+
         node = data.get("node", {})
         name = node.get("name", "Unknown Device")
 
-        if device_type == "waterfuse" and hardware_version == 5:
-            model = "Water Grip"
-        else:
-            return None
-        
         return cls(
             id=data["id"],
             name=name,
-            model=model,
+            model=model.name,
             serial=data.get("serial"),
             firmware_version=data.get("firmware_version"),
             hardware_version=hardware_version,
@@ -0,0 +1,108 @@
+"""Request scheduling shared by all Quandify API clients."""
+
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from .const import (
+    POLL_STAGGER_SECONDS,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_REQUESTS_PER_SECOND,
+    REQUEST_BACKOFF_BASE_SECONDS,
+    REQUEST_BACKOFF_MAX_SECONDS,
+    SCHEDULER_TICK_SECONDS,
+)
+
+
+class TokenBucket:
+    """A token bucket that hands out reservations instead of blocking."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize a full bucket."""
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it.
+
+        The balance may go negative, so waiters are served in arrival order.
+        """
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+
+class RequestScheduler:
+    """Rate limits requests per host and spreads poll cycles of config entries."""
+
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_REQUESTS_PER_SECOND,
+        burst: float = RATE_LIMIT_BURST,
+    ) -> None:
+        """Initialize the scheduler."""
+        self._rate = rate
+        self._burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._blocked_until: dict[str, float] = {}
+        self._pollers = 0
+
+    async def acquire(self, host: str) -> None:
+        """Wait until a request to `host` is allowed."""
+        if (blocked := self._blocked_until.get(host, 0) - time.monotonic()) > 0:
+            await asyncio.sleep(blocked)
+        if (bucket := self._buckets.get(host)) is None:
+            bucket = self._buckets[host] = TokenBucket(self._rate, self._burst)
+        if (delay := bucket.reserve()) > 0:
+            await asyncio.sleep(delay)
+
+    def defer(self, host: str, seconds: float) -> None:
+        """Hold back all requests to `host`, e.g. after a 429 response."""
+        until = time.monotonic() + seconds
+        self._blocked_until[host] = max(self._blocked_until.get(host, 0), until)
+
+    def poll_offset(self) -> float:
+        """Return a start offset for a new poller, so cycles are not synchronized."""
+        offset = (self._pollers * POLL_STAGGER_SECONDS) % SCHEDULER_TICK_SECONDS
+        self._pollers += 1
+        return offset
+
+
+_SCHEDULER = RequestScheduler()
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """Return the scheduler shared by all API clients."""
+    return _SCHEDULER
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return an exponential backoff delay with full jitter."""
+    return random.uniform(
+        0, min(REQUEST_BACKOFF_MAX_SECONDS, REQUEST_BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
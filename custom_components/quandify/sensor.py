@@ -1,4 +1,8 @@
 """Sensor platform for Quandify integration."""
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -9,81 +13,238 @@ from homeassistant.components.sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    EntityCategory,
+    UnitOfInformation,
     UnitOfTemperature,
+    UnitOfTime,
     UnitOfVolume,
+    UnitOfVolumeFlowRate,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .capabilities import entity_keys
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
-from .entity import QuandifyEntity
+from .entity import QuandifyEntity, QuandifyServiceEntity, compile_value_fn
+from .flow import FLOW_KEY, FlowTracker
 from .models import QuandifyDevice
 
+
+@dataclass(frozen=True, kw_only=True)
+class QuandifySensorEntityDescription(SensorEntityDescription):
+    """Describes a Quandify sensor, with an optional transform of the raw value."""
+
+    transform: Callable[[Any], Any] | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class QuandifyMetricSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor reporting the integration's own performance metrics."""
+
+    value_fn: Callable[[QuandifyDataUpdateCoordinator], Any]
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
+@dataclass(frozen=True, kw_only=True)
+class QuandifyFlowSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor derived from the volume history of a device."""
+
+    value_fn: Callable[[FlowTracker], float | None]
+
+
+def _capitalize(value: Any) -> str | None:
+    """Capitalize a string value, such as the water type."""
+    return value.capitalize() if value else None
+
+
 # Sensor descriptions
-TOTAL_VOLUME = SensorEntityDescription(
+TOTAL_VOLUME = QuandifySensorEntityDescription(
     key="status.total_volume",
     name="Total volume",
     native_unit_of_measurement=UnitOfVolume.LITERS,
     state_class=SensorStateClass.TOTAL_INCREASING,
     device_class=SensorDeviceClass.WATER)
 
-WATER_TEMP = SensorEntityDescription(
+WATER_TEMP = QuandifySensorEntityDescription(
     key="status.avg_water_temp",
     name="Water temperature",
     native_unit_of_measurement=UnitOfTemperature.CELSIUS,
     state_class=SensorStateClass.MEASUREMENT,
     device_class=SensorDeviceClass.TEMPERATURE)
 
-AMBIENT_TEMP = SensorEntityDescription(
+AMBIENT_TEMP = QuandifySensorEntityDescription(
     key="status.ambient_temp",
     name="Ambient temperature",
     native_unit_of_measurement=UnitOfTemperature.CELSIUS,
     state_class=SensorStateClass.MEASUREMENT,
     device_class=SensorDeviceClass.TEMPERATURE)
 
-WIFI_SIGNAL = SensorEntityDescription(
+WIFI_SIGNAL = QuandifySensorEntityDescription(
     key="status.wifi_signal_strength",
     name="Signal strength",
     native_unit_of_measurement=SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     device_class=SensorDeviceClass.SIGNAL_STRENGTH,
     state_class=SensorStateClass.MEASUREMENT)
 
-RSSI_SIGNAL = SensorEntityDescription(
+RSSI_SIGNAL = QuandifySensorEntityDescription(
     key="status.rssi",
     name="Signal strength",
     native_unit_of_measurement=SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     device_class=SensorDeviceClass.SIGNAL_STRENGTH,
     state_class=SensorStateClass.MEASUREMENT)
 
-WATER_TYPE = SensorEntityDescription(
+WATER_TYPE = QuandifySensorEntityDescription(
     key="sub_type",
     name="Water type",
-    icon="mdi:water-thermometer")
+    icon="mdi:water-thermometer",
+    transform=_capitalize)
+
+# Derived from successive total volume samples
+FLOW_SENSORS = (
+    QuandifyFlowSensorEntityDescription(
+        key="flow_rate",
+        name="Flow rate",
+        native_unit_of_measurement=UnitOfVolumeFlowRate.LITERS_PER_MINUTE,
+        device_class=SensorDeviceClass.VOLUME_FLOW_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda tracker: tracker.flow_rate),
+    QuandifyFlowSensorEntityDescription(
+        key="consumption_1h",
+        name="Water used last hour",
+        native_unit_of_measurement=UnitOfVolume.LITERS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:water",
+        value_fn=lambda tracker: tracker.consumption(3600)),
+    QuandifyFlowSensorEntityDescription(
+        key="consumption_24h",
+        name="Water used last 24 hours",
+        native_unit_of_measurement=UnitOfVolume.LITERS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:water",
+        value_fn=lambda tracker: tracker.consumption(86400)),
+    QuandifyFlowSensorEntityDescription(
+        key="continuous_flow",
+        name="Continuous flow duration",
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-alert-outline",
+        value_fn=lambda tracker: tracker.continuous_flow_minutes),
+)
+
+LAST_UPDATE = SensorEntityDescription(
+    key="last_update",
+    name="Last update",
+    device_class=SensorDeviceClass.TIMESTAMP,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False)
+
+# Integration metrics, on the service device of the config entry
+METRIC_SENSORS = (
+    QuandifyMetricSensorEntityDescription(
+        key="refresh_duration",
+        name="Refresh duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda coordinator: coordinator.api.metrics.last_refresh_ms),
+    QuandifyMetricSensorEntityDescription(
+        key="request_latency",
+        name="Average request latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda coordinator: coordinator.api.metrics.mean_request_ms),
+    QuandifyMetricSensorEntityDescription(
+        key="api_requests",
+        name="API requests",
+        icon="mdi:api",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.api.metrics.requests),
+    QuandifyMetricSensorEntityDescription(
+        key="api_retries",
+        name="API retries",
+        icon="mdi:refresh",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.api.metrics.retries),
+    QuandifyMetricSensorEntityDescription(
+        key="token_refreshes",
+        name="Token refreshes",
+        icon="mdi:key-change",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.api.metrics.token_refreshes),
+    QuandifyMetricSensorEntityDescription(
+        key="bytes_received",
+        name="Data received",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.api.metrics.bytes_received),
+    QuandifyMetricSensorEntityDescription(
+        key="stale_devices",
+        name="Stale devices",
+        icon="mdi:timer-sand",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: len(coordinator.stale_devices)),
+)
 
-# Sensor profiles
-DEVICE_SENSORS = {
-    "Water Grip": [TOTAL_VOLUME, WATER_TEMP, WIFI_SIGNAL, WATER_TYPE],
+# Sensor descriptions by key, as referenced by the capability registry
+SENSORS = {
+    description.key: description
+    for description in (
+        TOTAL_VOLUME,
+        WATER_TEMP,
+        AMBIENT_TEMP,
+        WIFI_SIGNAL,
+        RSSI_SIGNAL,
+        WATER_TYPE,
+    )
 }
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up the sensor entities."""
     coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[QuandifySensor] = []
-    for device in coordinator.devices:
-        if descriptions := DEVICE_SENSORS.get(device.model):
-            entities.extend(
-                QuandifySensor(coordinator, device, description) for description in descriptions
-            )
-    async_add_entities(entities)
+
+    @callback
+    def _async_add_devices(devices: list[QuandifyDevice]) -> None:
+        entities: list[SensorEntity] = []
+        for device in devices:
+            descriptions = [
+                SENSORS[key] for key in entity_keys(device.model, "sensor")
+            ]
+            if descriptions:
+                entities.extend(
+                    QuandifySensor(coordinator, device, description) for description in descriptions
+                )
+                if TOTAL_VOLUME in descriptions:
+                    entities.extend(
+                        QuandifyFlowSensor(coordinator, device, description)
+                        for description in FLOW_SENSORS
+                    )
+                entities.append(QuandifyLastUpdateSensor(coordinator, device))
+        async_add_entities(entities)
+
+    async_add_entities(
+        QuandifyMetricSensor(coordinator, entry.entry_id, description)
+        for description in METRIC_SENSORS
+    )
+    _async_add_devices(coordinator.devices)
+    entry.async_on_unload(coordinator.async_add_new_devices_listener(_async_add_devices))
 
 class QuandifySensor(QuandifyEntity, SensorEntity):
     """Implementation of a Quandify sensor."""
 
-    def __init__(self, coordinator: QuandifyDataUpdateCoordinator, device: QuandifyDevice, description: SensorEntityDescription):
+    entity_description: QuandifySensorEntityDescription
+
+    def __init__(self, coordinator: QuandifyDataUpdateCoordinator, device: QuandifyDevice, description: QuandifySensorEntityDescription):
         """Initialize the sensor."""
-        super().__init__(coordinator, device)
+        super().__init__(coordinator, device, description.key)
         self.entity_description = description
+        self._value_fn = compile_value_fn(description.key, description.transform)
         self._attr_unique_id = f"{self.device.id}_{self.entity_description.key}"
         self._update_attr()
 
@@ -95,20 +256,74 @@ class QuandifySensor(QuandifyEntity, SensorEntity):
 
     def _update_attr(self) -> None:
         """Update the state and attributes of the entity."""
-        value = self.device_data
-        if value is None:
-            self._attr_native_value = None
-            return
-
-        if self.entity_description.key == "sub_type":
-            sub_type = value.get("sub_type")
-            self._attr_native_value = sub_type.capitalize() if sub_type else None
-        else:
-            try:
-                for key_part in self.entity_description.key.split("."):
-                    if value is None:
-                        break
-                    value = value.get(key_part)
-            except AttributeError:
-                value = None
-            self._attr_native_value = value
+        self._attr_native_value = self._value_fn(self.device_data)
+
+
+class QuandifyFlowSensor(QuandifyEntity, SensorEntity):
+    """A value derived from the volume history of a device."""
+
+    entity_description: QuandifyFlowSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: QuandifyDataUpdateCoordinator,
+        device: QuandifyDevice,
+        description: QuandifyFlowSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
+        super().__init__(coordinator, device, FLOW_KEY)
+        self.entity_description = description
+        self._attr_unique_id = f"{self.device.id}_{description.key}"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the derived value."""
+        if (tracker := self.coordinator.flow.get(self.device.id)) is None:
+            return None
+        return self.entity_description.value_fn(tracker)
+
+
+class QuandifyLastUpdateSensor(QuandifyEntity, SensorEntity):
+    """When a device last returned good data, to spot stale devices."""
+
+    def __init__(self, coordinator: QuandifyDataUpdateCoordinator, device: QuandifyDevice):
+        """Initialize the sensor."""
+        super().__init__(coordinator, device)
+        # Every poll moves the timestamp, even when the device data is unchanged.
+        self.coordinator_context = None
+        self.entity_description = LAST_UPDATE
+        self._attr_unique_id = f"{self.device.id}_{LAST_UPDATE.key}"
+
+    @property
+    def available(self) -> bool:
+        """Stay available while the device is not, as that is when it matters."""
+        return self.coordinator.last_update_success
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return when the device last returned good data."""
+        if (health := self.coordinator.device_health.get(self.device.id)) is None:
+            return None
+        return health.last_success
+
+
+class QuandifyMetricSensor(QuandifyServiceEntity, SensorEntity):
+    """A performance metric of the integration."""
+
+    entity_description: QuandifyMetricSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: QuandifyDataUpdateCoordinator,
+        entry_id: str,
+        description: QuandifyMetricSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry_id)
+        self.entity_description = description
+        self._attr_unique_id = f"{entry_id}_{description.key}"
+
+    @property
+    def native_value(self) -> Any:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self.coordinator)
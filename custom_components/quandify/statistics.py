@@ -0,0 +1,124 @@
+"""Import of long-term water consumption statistics for the Quandify integration."""
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+import aiohttp
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .api import QuandifyAPI, QuandifyAPIError, QuandifyHistoryUnsupported
+from .const import DOMAIN, STATISTICS_BACKFILL_DAYS, STATISTICS_BATCH_SIZE
+from .models import QuandifyDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def statistic_id(device: QuandifyDevice) -> str:
+    """Return the external statistic id for a device's water consumption."""
+    return f"{DOMAIN}:water_{device.id.lower().replace('-', '_')}"
+
+
+def _parse_timestamp(value: Any) -> datetime | None:
+    """Parse a timestamp given as ISO 8601 or as seconds since the epoch, in UTC.
+
+    A timestamp without a time zone is taken to be in local time.
+    """
+    if isinstance(value, (int, float)):
+        return dt_util.utc_from_timestamp(value)
+    if isinstance(value, str) and (parsed := dt_util.parse_datetime(value)):
+        return dt_util.as_utc(parsed)
+    return None
+
+
+class QuandifyStatisticsImporter:
+    """Imports hourly consumption history as external statistics.
+
+    Each run continues from the last imported hour, so only new hours are
+    fetched. Points are written in batches as the pages arrive.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, api_for: Callable[[str], QuandifyAPI]
+    ) -> None:
+        """Initialize the importer. `api_for` returns the client to use per device."""
+        self.hass = hass
+        self.api_for = api_for
+        self.supported = True
+
+    async def async_import(self, devices: list[QuandifyDevice]) -> None:
+        """Import new consumption history for all devices."""
+        for device in devices:
+            if not self.supported:
+                return
+            try:
+                await self._async_import_device(device)
+            except QuandifyHistoryUnsupported as err:
+                _LOGGER.info("Not importing water statistics: %s", err)
+                self.supported = False
+            except (aiohttp.ClientError, TimeoutError, QuandifyAPIError) as err:
+                _LOGGER.debug("Statistics import failed for %s: %r", device.id, err)
+            except (HomeAssistantError, TypeError, ValueError) as err:
+                # Unexpected history data; the other devices are still imported.
+                _LOGGER.warning(
+                    "Could not import water statistics for %s: %r", device.id, err
+                )
+
+    async def _async_import_device(self, device: QuandifyDevice) -> None:
+        """Import the consumption history of one device since the last import."""
+        stat_id = statistic_id(device)
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, stat_id, True, {"sum"}
+        )
+        end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if last.get(stat_id):
+            row = last[stat_id][0]
+            start = dt_util.utc_from_timestamp(row["start"]) + timedelta(hours=1)
+            total = row["sum"] or 0.0
+        else:
+            start = end - timedelta(days=STATISTICS_BACKFILL_DAYS)
+            total = 0.0
+        if start >= end:
+            return
+
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{device.name} water",
+            source=DOMAIN,
+            statistic_id=stat_id,
+            unit_of_measurement=UnitOfVolume.LITERS,
+        )
+        batch: list[StatisticData] = []
+        api = self.api_for(device.id)
+        async for page in api.iter_consumption_history(device.id, start, end):
+            for point in page:
+                hour = _parse_timestamp(point.get("timestamp"))
+                volume = point.get("volume")
+                if (
+                    hour is None
+                    or volume is None
+                    or not start <= hour < end
+                    or hour.minute
+                    or hour.second
+                    or hour.microsecond
+                ):
+                    # Statistics only accept points at the start of an hour.
+                    continue
+                total += volume
+                batch.append(StatisticData(start=hour, state=volume, sum=total))
+                if len(batch) >= STATISTICS_BATCH_SIZE:
+                    async_add_external_statistics(self.hass, metadata, batch)
+                    batch = []
+        if batch:
+            async_add_external_statistics(self.hass, metadata, batch)
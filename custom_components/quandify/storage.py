@@ -0,0 +1,104 @@
+"""Persistent snapshot storage for the Quandify integration."""
+
+from dataclasses import asdict
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_SAVE_DELAY_SECONDS, STORAGE_VERSION
+from .flow import FlowTracker
+from .models import QuandifyDevice, QuandifyDeviceData, QuandifyParseError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QuandifyStore:
+    """Stores the device list, last snapshot and flow history of a config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        # State passed to async_save that has not been written yet.
+        self._pending: tuple[
+            list[QuandifyDevice],
+            dict[str, QuandifyDeviceData] | None,
+            dict[str, FlowTracker],
+        ] | None = None
+
+    async def async_load(
+        self,
+    ) -> tuple[
+        list[QuandifyDevice],
+        dict[str, QuandifyDeviceData],
+        dict[str, FlowTracker],
+    ] | None:
+        """Load the stored device list, snapshot and flow history, if usable.
+
+        Unreadable flow history is dropped without discarding the snapshot.
+        """
+        if (stored := await self._store.async_load()) is None:
+            return None
+
+        try:
+            devices = [QuandifyDevice(**device) for device in stored["devices"]]
+            snapshot = {
+                device_id: QuandifyDeviceData.from_api(device_data)
+                for device_id, device_data in stored["data"].items()
+            }
+        except (KeyError, TypeError, QuandifyParseError) as err:
+            _LOGGER.warning("Ignoring unreadable Quandify snapshot: %s", err)
+            return None
+
+        try:
+            flow = {
+                device_id: FlowTracker.from_dict(tracker)
+                for device_id, tracker in stored.get("flow", {}).items()
+            }
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring unreadable Quandify flow history: %s", err)
+            flow = {}
+        return devices, snapshot, flow
+
+    @callback
+    def async_save(
+        self,
+        devices: list[QuandifyDevice],
+        data: dict[str, QuandifyDeviceData] | None,
+        flow: dict[str, FlowTracker],
+    ) -> None:
+        """Schedule a save of the given state.
+
+        The delay starts with the first call after a write. Later calls only
+        replace the state to write, so frequent updates cannot keep postponing
+        the save.
+        """
+        pending = self._pending is not None
+        self._pending = (devices, data, flow)
+        if not pending:
+            self._store.async_delay_save(
+                self._async_data_to_save, STORAGE_SAVE_DELAY_SECONDS
+            )
+
+    @callback
+    def _async_data_to_save(self) -> dict[str, Any]:
+        """Return the latest state passed to async_save, in a JSON friendly form."""
+        devices, data, flow = self._pending
+        self._pending = None
+        return {
+            "devices": [asdict(device) for device in devices],
+            "data": {
+                device_id: asdict(device_data)
+                for device_id, device_data in (data or {}).items()
+            },
+            "flow": {
+                device_id: tracker.as_dict() for device_id, tracker in flow.items()
+            },
+        }
+
+    async def async_remove(self) -> None:
+        """Remove the stored snapshot."""
+        await self._store.async_remove()
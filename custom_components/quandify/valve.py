@@ -0,0 +1,159 @@
+"""Valve platform for Quandify integration."""
+import asyncio
+import logging
+
+from homeassistant.components.valve import (
+    ValveDeviceClass,
+    ValveEntity,
+    ValveEntityFeature,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .capabilities import entity_keys
+from .commands import QuandifyCommand
+from .const import DOMAIN
+from .coordinator import QuandifyDataUpdateCoordinator
+from .entity import QuandifyCommandEntity
+from .models import QuandifyDevice, QuandifyDeviceData
+
+_LOGGER = logging.getLogger(__name__)
+
+VALVE_OPEN = "open"
+VALVE_CLOSED = "closed"
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up valves for devices whose model supports one and that report it.
+
+    Devices that start reporting a valve later, such as ones found by
+    rediscovery before their first poll, get their valve on that update.
+    """
+    coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    added: set[str] = set()
+
+    @callback
+    def _async_add_valves() -> None:
+        data = coordinator.data or {}
+        # Forget removed devices, so their valve comes back if they do.
+        added.intersection_update(device.id for device in coordinator.devices)
+        new_valves = [
+            QuandifyValve(coordinator, device)
+            for device in coordinator.devices
+            if device.id not in added
+            and "valve" in entity_keys(device.model, "valve")
+            and (device_data := data.get(device.id)) is not None
+            and device_data.valve is not None
+        ]
+        if new_valves:
+            added.update(valve.device.id for valve in new_valves)
+            async_add_entities(new_valves)
+
+    _async_add_valves()
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_valves))
+
+
+class QuandifyValve(QuandifyCommandEntity, ValveEntity):
+    """The shut-off valve of a Quandify device.
+
+    Commands show the requested state right away. The device alone is then
+    polled at a short interval until it reports that state or a deadline passes.
+    """
+
+    _attr_name = "Valve"
+    _attr_device_class = ValveDeviceClass.WATER
+    _attr_reports_position = False
+    _attr_supported_features = ValveEntityFeature.OPEN | ValveEntityFeature.CLOSE
+
+    def __init__(self, coordinator: QuandifyDataUpdateCoordinator, device: QuandifyDevice):
+        """Initialize the valve."""
+        super().__init__(coordinator, device, "valve.state")
+        self._attr_unique_id = f"{self.device.id}_valve"
+        self._optimistic_state: str | None = None
+        self._confirm_task: asyncio.Task[None] | None = None
+
+    @property
+    def is_closed(self) -> bool | None:
+        """Return whether the valve is closed, optimistically while a command runs."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state == VALVE_CLOSED
+        device_data = self.device_data
+        if device_data is None or device_data.valve is None:
+            return None
+        if device_data.valve.state not in (VALVE_OPEN, VALVE_CLOSED):
+            return None
+        return device_data.valve.state == VALVE_CLOSED
+
+    async def async_open_valve(self) -> None:
+        """Open the valve."""
+        await self._async_send_command(VALVE_OPEN)
+
+    async def async_close_valve(self) -> None:
+        """Close the valve."""
+        await self._async_send_command(VALVE_CLOSED)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop confirming a command when the entity is removed."""
+        self._cancel_confirmation()
+        await super().async_will_remove_from_hass()
+
+    async def _async_send_command(self, state: str) -> None:
+        """Send a valve command, then confirm it in the background.
+
+        The service call returns once the cloud accepted the command, so
+        automations do not wait for the device to report its new state.
+        """
+        _LOGGER.info("Setting valve of device %s to %s", self.device.id, state)
+        self._cancel_confirmation()
+        self._optimistic_state = state
+        self.async_write_ha_state()
+
+        command = (
+            QuandifyCommand.OPEN_VALVE if state == VALVE_OPEN else QuandifyCommand.CLOSE_VALVE
+        )
+        result = await self.coordinator.async_send_command(self.device.id, command)
+        if result.command != command:
+            # A later command replaced this one and now owns the valve state.
+            _LOGGER.debug(
+                "Valve command %s for device %s was replaced by %s",
+                command,
+                self.device.id,
+                result.command,
+            )
+            return
+        if not result.success:
+            self._optimistic_state = None
+            self.async_write_ha_state()
+            raise HomeAssistantError(f"Failed to set valve to {state}: {result.error}")
+
+        self._confirm_task = self.hass.async_create_background_task(
+            self._async_confirm_state(state),
+            f"{DOMAIN} confirm valve {self.device.id}",
+        )
+
+    async def _async_confirm_state(self, state: str) -> None:
+        """Poll this device until it reports `state`, then drop the optimistic state."""
+
+        def _is_confirmed(device_data: QuandifyDeviceData) -> bool:
+            return device_data.valve is not None and device_data.valve.state == state
+
+        if not await self.coordinator.async_confirm_device_state(
+            self.device.id, _is_confirmed
+        ):
+            _LOGGER.warning(
+                "Valve of device %s did not report %s in time", self.device.id, state
+            )
+        self._confirm_task = None
+        self._optimistic_state = None
+        self.async_write_ha_state()
+
+    @callback
+    def _cancel_confirmation(self) -> None:
+        """Stop confirming an earlier command, which a new one replaces."""
+        if self._confirm_task is not None:
+            self._confirm_task.cancel()
+            self._confirm_task = None